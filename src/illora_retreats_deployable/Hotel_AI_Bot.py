@@ -4,16 +4,22 @@ Only the LLM integration was updated - all sheet extraction, prompt builders,
 chat history, and other features are left intact.
 """
 
-import requests
+import httpx
 import json
 import logging
 import os
 import time
 import threading
+import atexit
+import hashlib
+import re
+import numpy as np
+import sys
 from typing import Optional, List, Dict, Any
-from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
-from typing import Tuple
+from datetime import datetime, timezone
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple, Iterator
 
 # Try to import Groq SDK (optional)
 try:
@@ -22,6 +28,13 @@ try:
 except Exception:
     GROQ_AVAILABLE = False
 
+# Prefer orjson for (de)serialization, stdlib json as fallback
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except Exception:
+    ORJSON_AVAILABLE = False
+
 # (keep other imports the same)
 from langchain_openai import ChatOpenAI  # left as-is if used elsewhere
 from vector_store import create_vector_store
@@ -31,6 +44,16 @@ from logger import setup_logger
 logger = logging.getLogger("QAAgent")
 
 
+def _json_loads(data):
+    return orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
+
+
+def _json_dumps(obj) -> bytes:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+
 class IloraRetreatsConciergeBot:
     """
     Complete ILORA RETREATS Concierge Bot with intelligent guest/non-guest differentiation.
@@ -88,8 +111,20 @@ class IloraRetreatsConciergeBot:
         self.retrieve_timeout = float(getattr(Config, "RETRIEVER_TIMEOUT", 2.0))
 
         self.sheet_last_refresh = 0
+        # Prompt blocks that only change when sheet data changes; rebuilt by _rebuild_prompt_cache
+        self._prompt_cache_version = -1
+        self._cached_menu = ""
+        self._cached_rules = ""
+        self._cached_campaigns = ""
+        self._cached_hotel_data = "No specific data available."
         self.use_sheet = bool(self.sheet_api)
-        self.http = requests.Session()
+        # Long-lived HTTP/2 clients so TLS handshakes amortize across sheet and LLM calls
+        self.http = httpx.Client(http2=True, follow_redirects=True)
+        self._llm_http = httpx.Client(http2=True, timeout=self.llm_timeout)
+        # Auth headers live on the client as session defaults - nothing is rebuilt per call
+        self._llm_http.headers.update(self.llm_headers)
+        atexit.register(self.http.close)
+        atexit.register(self._llm_http.close)
 
         # Data Storage
         self.qna_rows: List[Dict[str, Any]] = []
@@ -98,16 +133,39 @@ class IloraRetreatsConciergeBot:
         self.menu_rows: List[Dict[str, Any]] = []
 
         # Chat History Management
-        self.chat_histories: Dict[str, List[Dict[str, Any]]] = {}
-        self.chat_lock = threading.Lock()
+        # session_key -> deque of (role, content, timestamp, meta) tuples, least recently used first
+        # Updated in place on the request path under _history_lock, so the next turn always sees
+        # the previous one; only the disk writes are left to the writer thread
+        self.chat_histories: "OrderedDict[str, deque]" = OrderedDict()
+        self._history_lock = threading.Lock()
+        self._writer_stop = threading.Event()
         self.chat_history_limit = 10
+        self.chat_history_max_sessions = int(getattr(Config, "CHAT_HISTORY_MAX_SESSIONS", 10000))
+        self._evicted_histories: Dict[str, deque] = {}
         self.chat_history_persist = True
         self.chat_history_dir = os.path.join("data", "chat_histories")
+        self.chat_flush_interval = float(getattr(Config, "CHAT_FLUSH_INTERVAL", 1.0))
+        self._dirty_sessions: set = set()
         if self.chat_history_persist:
             os.makedirs(self.chat_history_dir, exist_ok=True)
+        # Single writer thread: flushes touched histories to disk off the request path
+        self._writer_thread = threading.Thread(
+            target=self._history_writer_loop, name="chat-history-writer", daemon=True
+        )
+        self._writer_thread.start()
+        atexit.register(self._stop_history_writer)
 
-        # Thread Pool for Timeouts
-        self._executor = ThreadPoolExecutor(max_workers=4)
+        # Answer cache in front of the LLM (exact match, optional semantic match)
+        self.answer_cache_size = int(getattr(Config, "ANSWER_CACHE_SIZE", 512))
+        self.semantic_cache_enabled = bool(getattr(Config, "SEMANTIC_CACHE", False))
+        self.semantic_cache_threshold = float(getattr(Config, "SEMANTIC_CACHE_THRESHOLD", 0.92))
+        self.semantic_cache_model = getattr(Config, "SEMANTIC_CACHE_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+        self._answer_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._answer_cache_lock = threading.Lock()
+        self._embedder = None
+
+        # Thread pool for the concurrent sheet fetches in _refresh_sheets
+        self._sheet_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="sheet-fetch")
 
         # Load Initial Data
         if self.use_sheet:
@@ -118,10 +176,16 @@ class IloraRetreatsConciergeBot:
                 logger.warning(f"Sheets load failed: {e}")
                 self.use_sheet = False
 
+        # Agent name shown in prompts (cached, reloaded when agents.json changes)
+        self.default_agent_name = "ILORA Concierge"
+        self.agents_file = os.path.join("data", "agents.json")
+        self._load_agent_name()
+
         # Load Dos/Donts from file as fallback
         if not self.dos_donts:
             self.dos_donts_path = os.path.join("data", "dos_donts.json")
             self.dos_donts = self._load_dos_donts_from_file()
+        self._rebuild_prompt_cache()
 
         logger.info("ILORA RETREATS ConciergeBot ready with LLM.")
         print(f"[DEBUG] Init complete in {time.time() - start_init:.2f}s")
@@ -141,57 +205,157 @@ class IloraRetreatsConciergeBot:
         now = time.time()
         if not force and now - self.sheet_last_refresh < self.sheet_refresh_interval:
             return
-        self.qna_rows = self._fetch_sheet_data(self.qna_sheet) or []
-        raw_dos = self._fetch_sheet_data(self.dos_sheet) or []
+        # Fetch all four sheets concurrently so a refresh costs max(t_i) instead of sum(t_i)
+        sheet_names = (self.qna_sheet, self.dos_sheet, self.campaign_sheet, self.menu_sheet)
+        futures = [self._sheet_executor.submit(self._fetch_sheet_data, name) for name in sheet_names]
+        qna_rows, raw_dos, campaigns, menu_rows = (f.result() or [] for f in futures)
+        self.qna_rows = qna_rows
         self.dos_donts = [{"do": row.get("Do", ""), "dont": row.get("Don't", "")} for row in raw_dos]
-        self.campaigns = self._fetch_sheet_data(self.campaign_sheet) or []
-        self.menu_rows = self._fetch_sheet_data(self.menu_sheet) or []
+        self.campaigns = campaigns
+        self.menu_rows = menu_rows
         self.sheet_last_refresh = now
+        self._rebuild_prompt_cache()
+
+    def _rebuild_prompt_cache(self):
+        """Format the sheet-derived prompt blocks once per data load instead of per ask()."""
+        self._cached_menu = self._format_menu_text()
+        self._cached_rules = self._format_rules_text()
+        self._cached_campaigns = self._format_campaigns_text()
+        self._cached_hotel_data = self._format_hotel_data()
+        self._prompt_cache_version += 1
 
     def _load_dos_donts_from_file(self):
         if not os.path.exists(self.dos_donts_path):
             return []
         try:
-            with open(self.dos_donts_path, "r", encoding="utf-8") as f:
-                return json.load(f)
+            with open(self.dos_donts_path, "rb") as f:
+                return _json_loads(f.read())
         except Exception:
             return []
 
+    def _load_agent_name(self):
+        """Read agents.json once and index agent names by their `Name` role."""
+        self._agents_mtime = None
+        self._agents_by_name = {}
+        try:
+            self._agents_mtime = os.stat(self.agents_file).st_mtime
+            with open(self.agents_file, "rb") as f:
+                agents = _json_loads(f.read())
+            self._agents_by_name = {
+                agent.get("Name"): agent["agent_name"]
+                for agent in agents
+                if isinstance(agent, dict) and "agent_name" in agent
+            }
+        except Exception:
+            pass
+        self._agent_name = self._agents_by_name.get("Front Desk", self.default_agent_name)
+
+    def _get_agent_name(self) -> str:
+        """Return the front desk agent name, re-reading agents.json only when its mtime changes."""
+        try:
+            mtime = os.stat(self.agents_file).st_mtime
+        except OSError:
+            mtime = None
+        if mtime != self._agents_mtime:
+            self._load_agent_name()
+        return self._agent_name
+
     # ==================== CHAT HISTORY ====================
     def add_chat_message(self, session_key: str, role: str, content: str, meta: dict = None):
-        with self.chat_lock:
-            if session_key not in self.chat_histories:
-                self.chat_histories[session_key] = []
-            self.chat_histories[session_key].append({
-                "role": role,
-                "content": content,
-                "meta": meta or {},
-                "timestamp": datetime.utcnow().isoformat() + "Z"
-            })
+        # Interned keys/roles make the dict lookups and tuple storage pointer-cheap
+        role = sys.intern(role)
+        if isinstance(session_key, str):
+            session_key = sys.intern(session_key)
+        with self._history_lock:
+            self._apply_chat_message(session_key, (role, content, time.time(), meta or {}))
+
+    def _apply_chat_message(self, session_key: str, record: tuple):
+        """Caller holds _history_lock: append a message and evict the coldest session if needed."""
+        history = self.chat_histories.get(session_key)
+        if history is None:
+            history = self.chat_histories[session_key] = deque(maxlen=self.chat_history_limit)
+        else:
+            self.chat_histories.move_to_end(session_key)
+        history.append(record)
+        self._dirty_sessions.add(session_key)
+        # Evict the coldest session; keep it around until its last messages are flushed
+        if len(self.chat_histories) > self.chat_history_max_sessions:
+            old_key, old_history = self.chat_histories.popitem(last=False)
+            if old_key in self._dirty_sessions:
+                self._evicted_histories[old_key] = old_history
+
+    def _chat_history_path(self, session_key: str) -> str:
+        """`<sha1 of session_key>.json` in chat_history_dir; the raw key never reaches the filesystem."""
+        digest = hashlib.sha1(str(session_key).encode("utf-8")).hexdigest()
+        return os.path.join(self.chat_history_dir, f"{digest}.json")
+
+    def _flush_chat_histories(self):
+        """Writer thread: write every session touched since the last flush to `<session_key>.json`."""
+        # Snapshot under the lock, serialize and write outside it
+        with self._history_lock:
+            dirty, self._dirty_sessions = self._dirty_sessions, set()
+            evicted, self._evicted_histories = self._evicted_histories, {}
+            snapshots = {}
+            for key in dirty:
+                history = self.chat_histories.get(key)
+                if history is None:
+                    history = evicted.get(key)
+                if history is not None:
+                    snapshots[key] = list(history)
+        for key, history in snapshots.items():
+            messages = [
+                {"role": role, "content": content, "meta": meta, "timestamp": datetime.fromtimestamp(ts, timezone.utc).isoformat().replace("+00:00", "Z")}
+                for role, content, ts, meta in history
+            ]
+            path = self._chat_history_path(key)
+            tmp_path = f"{path}.tmp"
+            try:
+                with open(tmp_path, "wb") as f:
+                    f.write(_json_dumps(messages))
+                os.replace(tmp_path, path)
+            except Exception as e:
+                logger.warning(f"Failed to persist chat history for {key}: {e}")
+
+    def _history_writer_loop(self):
+        # wait() returns True once _stop_history_writer sets the event; flush a last time then
+        while not self._writer_stop.wait(self.chat_flush_interval):
+            if self.chat_history_persist:
+                self._flush_chat_histories()
+        if self.chat_history_persist:
+            self._flush_chat_histories()
+
+    def _stop_history_writer(self):
+        self._writer_stop.set()
+        self._writer_thread.join(timeout=5)
 
     def get_recent_history(self, session_key: str) -> list:
-        with self.chat_lock:
-            return self.chat_histories.get(session_key, [])[-self.chat_history_limit:]
+        with self._history_lock:
+            return list(self.chat_histories.get(session_key, ()))
 
     def _format_conversation_for_prompt(self, history: list) -> str:
         if not history:
             return ""
-        lines = []
-        for msg in history[-self.chat_history_limit:]:
-            role = msg.get("role", "")
-            content = msg.get("content", "")
-            lines.append(f"{role.title()}: {content}")
-        return "\n".join(lines)
+        return "\n".join([f"{role.title()}: {content}" for role, content, _, _ in history[-self.chat_history_limit:]])
 
     # ==================== SESSION HANDLING ====================
+    # (key, label) pairs rendered into the user profile block, in order
+    _SESSION_FIELDS = (
+        ("client_id", "Client ID"),
+        ("name", "Name"),
+        ("email", "Email"),
+        ("booking_id", "Booking ID"),
+        ("workflow_stage", "Workflow Stage"),
+        ("room_alloted", "Room"),
+    )
+
     def _extract_session_object(self, user_session, session_key):
-        if not user_session:
+        if not user_session or not isinstance(user_session, dict):
             return None, None
-        if isinstance(user_session, dict) and ("frontend" in user_session or "normalized" in user_session):
-            norm = user_session.get("normalized", {}) or {}
+        if "frontend" in user_session or "normalized" in user_session:
+            norm = user_session.get("normalized") or {}
             key = norm.get("email") or norm.get("client_id") or session_key
             return key, user_session
-        if isinstance(user_session, dict) and session_key and session_key in user_session:
+        if session_key and session_key in user_session:
             return session_key, user_session[session_key]
         return None, None
 
@@ -199,183 +363,205 @@ class IloraRetreatsConciergeBot:
         if not isinstance(session_obj, dict):
             return ""
         norm = session_obj.get("normalized") or session_obj
-        parts = []
-        if "client_id" in norm:
-            parts.append(f"Client ID: {norm['client_id']}")
-        if "name" in norm:
-            parts.append(f"Name: {norm['name']}")
-        if "email" in norm:
-            parts.append(f"Email: {norm['email']}")
-        if "booking_id" in norm:
-            parts.append(f"Booking ID: {norm['booking_id']}")
-        if "workflow_stage" in norm:
-            parts.append(f"Workflow Stage: {norm['workflow_stage']}")
-        if "room_alloted" in norm:
-            parts.append(f"Room: {norm['room_alloted']}")
+        parts = [f"{label}: {norm[key]}" for key, label in self._SESSION_FIELDS if key in norm]
         if "check_in" in norm or "check_out" in norm:
             parts.append(f"Stay: {norm.get('check_in','')} → {norm.get('check_out','')}")
         return "\n".join(parts)
 
     # ==================== PROMPT BUILDING ====================
+    # Stable blocks (hotel info, menu, rules, campaigns, hotel data) come first and the
+    # per-user blocks (profile, conversation, query) last, so consecutive prompts share
+    # the longest possible prefix for Groq's prompt caching. The constant text is kept
+    # in class-level parts so each prompt is a single "".join over a tuple.
+    _GUEST_PROMPT_INTRO = (
+        ", a knowledgeable, polite, and concise concierge assistant at *ILORA RETREATS*.\n\n"
+        "Note: Give concise to the point answers which are helpful to the user query\n\n"
+        "ILORA RETREATS INFORMATION:\n"
+        "- A luxury safari camp in Kenya's Masai Mara, near Olkiombo Airstrip\n"
+        "- 14 fully equipped LUXURY TENTS (our only room type)\n"
+        "- En-suite bathrooms, private verandas, accessible facilities\n"
+        "- Pool, spa, gym, yoga, bush dinners, stargazing\n"
+        "- Activities: game drives, walking safaris, hot air balloon rides, Maasai cultural experiences\n"
+        "- Full-board rates: USD 500–650 per night (premium activities extra)\n"
+        "- Emphasis on sustainability and comfort\n\n"
+        "GUEST STATUS - FULL ACCESS:\n"
+        "This user is a REGISTERED GUEST with complete access to:\n"
+        "✓ 24x7 Room Service\n"
+        "✓ Spa & Wellness Treatments (booking and inquiries)\n"
+        "✓ Gym & Fitness Center\n"
+        "✓ Pool Access\n"
+        "✓ In-room Dining (full menu access)\n"
+        "✓ Concierge Services\n"
+        "✓ Activity Bookings (safaris, balloons, cultural experiences)\n"
+        "✓ Special Requests & Arrangements\n"
+        "✓ Meeting Spaces\n"
+        "✓ Personalized Hospitality\n\n"
+        "HOTEL DATA (Relevant Information):\n"
+    )
+    _GUEST_PROMPT_RULES = (
+        "IMPORTANT RULES:\n"
+        "1. ❌ Do NOT hallucinate or provide inaccurate information\n"
+        "2. ✓ Answer from Hotel Data first; use general knowledge cautiously\n"
+        "3. ✓ If answer unavailable, politely state so and offer to raise a ticket\n"
+        "4. ✓ Respect authority boundaries (maintenance, billing need approvals)\n"
+        "5. ✓ You CAN help with bookings, service requests, and arrangements for this guest\n"
+        "6. ✓ Be warm, personalized, and address guest by name when appropriate\n"
+        "7. ❌ DO NOT GIVE PHONE NUMBERS unless absolutely necessary\n"
+        "8. ✓ Ask clarifying questions if unsure\n\n"
+        "If someone asks for checkIn check whether the ID section is DONE or not . If not then we have to provide them with the following link: **https://forms.gle/RvnsymRmBoKu3Ns26** to complete the checkin\n\n"
+        "Note if the room is not alloted to the user do not give access to in-room services, laundry services , spa services etc. Politely let him know that your room is not alloted yet once its done you could be able to guide him\n\n"
+        "Here is the user profile:"
+    )
+    _GUEST_PROMPT_OUTRO = "\n\nProvide a concise helpful, accurate, and concise response based on the above."
+
+    _NON_GUEST_PROMPT_INTRO = (
+        ", a polite and helpful assistant at *ILORA RETREATS*.\n\n"
+        "Note: Give concise to the point answers which are helpful to the user query\n\n"
+        "ILORA RETREATS OVERVIEW:\n"
+        "Ilora Retreats is a luxury safari camp in Kenya's Masai Mara, near Olkiombo Airstrip. "
+        "We offer 14 fully equipped luxury tents with en-suite bathrooms, private verandas, and modern amenities. "
+        "Our retreat features a pool, spa, gym, yoga facilities, and various safari activities including game drives, "
+        "walking safaris, hot air balloon rides, and Maasai cultural experiences.\n\n"
+        "NON-GUEST STATUS - LIMITED ACCESS:\n"
+        "This user is NOT currently a registered guest. You can help them with:\n"
+        "✓ General information about ILORA RETREATS\n"
+        "✓ Room types (14 luxury tents) and general availability\n"
+        "✓ Pricing ranges (USD 500-650/night full-board)\n"
+        "✓ Location and directions (Masai Mara, near Olkiombo Airstrip)\n"
+        "✓ Activities overview (safaris, balloons, cultural experiences)\n"
+        "✓ Facilities overview (spa, pool, gym, dining)\n"
+        "✓ Booking process and reservation assistance\n"
+        "✓ General inquiry handling\n\n"
+        "RESTRICTED - CANNOT ACCESS:\n"
+        "✗ Detailed menu prices or in-room dining options\n"
+        "✗ Cannot book specific spa treatments or room service\n"
+        "✗ Cannot make in-stay arrangements\n"
+        "✗ Cannot access guest-only services\n"
+        "✗ Cannot view or modify existing bookings\n\n"
+        "HOTEL DATA (Relevant Information):\n"
+    )
+    _NON_GUEST_PROMPT_RULES = (
+        "IMPORTANT RULES:\n"
+        "1. ✓ Be welcoming and encouraging about booking a stay\n"
+        "2. ✓ If they ask about guest-only services (room service, spa bookings), politely explain "
+        "they need to be a registered guest to access these services\n"
+        "3. ✓ Encourage them to make a reservation for full access to amenities\n"
+        "4. ✓ Provide general pricing: Full-board rates start around USD 500–650 per night\n"
+        "5. ❌ Do NOT hallucinate. Stick to general facts about the retreat\n"
+        "6. ✓ If they want to book, guide them to contact reservations\n"
+        "7. ✓ Be professional, friendly, and persuasive about the unique luxury safari experience\n"
+        "8. ✓ Emphasize sustainability, comfort, and immersive nature experience\n\n"
+        "If the user's ID section is empty encourage him to do web-checkin indeirectly (only once)"
+        "If user asks for checkIn check whether the ID section is DONE or not  . If not then we have to provide them with the following link: **https://forms.gle/RvnsymRmBoKu3Ns26** to complete the checkin\n\n"
+        "Here is the user profile:\n"
+    )
+    _NON_GUEST_PROMPT_OUTRO = "\n\nProvide a concise helpful response that encourages booking while answering their query accurately."
+
+    # Keyword gates deciding whether the guest prompt needs the menu / campaigns blocks
+    _QUERY_TOKEN_RE = re.compile(r"[a-z]+")
+    _MENU_KEYWORDS = frozenset({
+        "menu", "food", "eat", "eating", "hungry", "lunch", "dinner", "breakfast", "brunch",
+        "dining", "dine", "drink", "drinks", "beverage", "beverages", "wine", "beer", "cocktail",
+        "cocktails", "bar", "coffee", "tea", "juice", "meal", "meals", "snack", "snacks",
+        "dish", "dishes", "vegan", "vegetarian", "dessert", "order",
+    })
+    _CAMPAIGN_KEYWORDS = frozenset({
+        "offer", "offers", "deal", "deals", "promo", "promotion", "promotions", "discount",
+        "discounts", "campaign", "campaigns", "package", "packages", "special", "specials",
+    })
+
     def _build_guest_prompt(self, hotel_data: str, query: str, user_profile_text: str,
                            recent_conversation: str, menu_text: str, rules_text: str,
                            campaigns_text: str, agent_name: str) -> str:
         user_profile_block = f"\n\nGuest Profile:\n{user_profile_text}" if user_profile_text else ""
         recent_conv_text = f"\n\nRecent Conversation:\n{recent_conversation}" if recent_conversation else ""
-        prompt = (
-            f"You are {agent_name}, a knowledgeable, polite, and concise concierge assistant at *ILORA RETREATS*.\n\n"
-            f"Note: Give concise to the point answers which are helpful to the user query\n\n"
-            f"Here is the user profile:{user_profile_block}. Note if the room is not alloted to the user do not give access to in-room services, laundry services , spa services etc. Politely let him know that your room is not alloted yet once its done you could be able to guide him\n\n"
-            f"Recent Conversation:\n{recent_conv_text}\n\n"
-            f"If someone asks for checkIn check whether the ID section is DONE or not . If not then we have to provide them with the following link: **https://forms.gle/RvnsymRmBoKu3Ns26** to complete the checkin"
-            f"ILORA RETREATS INFORMATION:\n"
-            f"- A luxury safari camp in Kenya's Masai Mara, near Olkiombo Airstrip\n"
-            f"- 14 fully equipped LUXURY TENTS (our only room type)\n"
-            f"- En-suite bathrooms, private verandas, accessible facilities\n"
-            f"- Pool, spa, gym, yoga, bush dinners, stargazing\n"
-            f"- Activities: game drives, walking safaris, hot air balloon rides, Maasai cultural experiences\n"
-            f"- Full-board rates: USD 500–650 per night (premium activities extra)\n"
-            f"- Emphasis on sustainability and comfort\n\n"
-            f"GUEST STATUS - FULL ACCESS:\n"
-            f"This user is a REGISTERED GUEST with complete access to:\n"
-            f"✓ 24x7 Room Service\n"
-            f"✓ Spa & Wellness Treatments (booking and inquiries)\n"
-            f"✓ Gym & Fitness Center\n"
-            f"✓ Pool Access\n"
-            f"✓ In-room Dining (full menu access)\n"
-            f"✓ Concierge Services\n"
-            f"✓ Activity Bookings (safaris, balloons, cultural experiences)\n"
-            f"✓ Special Requests & Arrangements\n"
-            f"✓ Meeting Spaces\n"
-            f"✓ Personalized Hospitality\n\n"
-            f"HOTEL DATA (Relevant Information):\n{hotel_data}\n\n"
-            f"{menu_text}\n\n"
-            f"{rules_text}\n\n"
-            f"{campaigns_text}\n\n"
-            f"GUEST QUERY: {query}\n\n"
-            f"IMPORTANT RULES:\n"
-            f"1. ❌ Do NOT hallucinate or provide inaccurate information\n"
-            f"2. ✓ Answer from Hotel Data first; use general knowledge cautiously\n"
-            f"3. ✓ If answer unavailable, politely state so and offer to raise a ticket\n"
-            f"4. ✓ Respect authority boundaries (maintenance, billing need approvals)\n"
-            f"5. ✓ You CAN help with bookings, service requests, and arrangements for this guest\n"
-            f"6. ✓ Be warm, personalized, and address guest by name when appropriate\n"
-            f"7. ❌ DO NOT GIVE PHONE NUMBERS unless absolutely necessary\n"
-            f"8. ✓ Ask clarifying questions if unsure\n\n"
-            f"Provide a concise helpful, accurate, and concise response based on the above."
-        )
-        return prompt
+        return "".join((
+            "You are ", agent_name, self._GUEST_PROMPT_INTRO,
+            hotel_data, "\n\n", menu_text, "\n\n", rules_text, "\n\n", campaigns_text, "\n\n",
+            self._GUEST_PROMPT_RULES, user_profile_block,
+            "\n\nRecent Conversation:\n", recent_conv_text,
+            "\n\nGUEST QUERY: ", query, self._GUEST_PROMPT_OUTRO,
+        ))
 
     def _build_non_guest_prompt(self, query: str, recent_conversation: str, agent_name: str, hotel_data, rules_text, campaigns_text, user_profile_block) -> str:
         recent_conv_text = f"\n\nRecent Conversation:\n{recent_conversation}" if recent_conversation else ""
-        prompt = (
-            f"You are {agent_name}, a polite and helpful assistant at *ILORA RETREATS*.\n\n" 
-            f"Note: Give concise to the point answers which are helpful to the user query\n\n"
-            f"Here is the user profile:\n{user_profile_block}\n\n"
-            f"Recent Conversation:\n{recent_conv_text}\n\n"
-            f"If the user's ID section is empty encourage him to do web-checkin indeirectly (only once)"
-            f"If user asks for checkIn check whether the ID section is DONE or not  . If not then we have to provide them with the following link: **https://forms.gle/RvnsymRmBoKu3Ns26** to complete the checkin"
-            f"ILORA RETREATS OVERVIEW:\n"
-            f"Ilora Retreats is a luxury safari camp in Kenya's Masai Mara, near Olkiombo Airstrip. "
-            f"We offer 14 fully equipped luxury tents with en-suite bathrooms, private verandas, and modern amenities. "
-            f"Our retreat features a pool, spa, gym, yoga facilities, and various safari activities including game drives, "
-            f"walking safaris, hot air balloon rides, and Maasai cultural experiences.\n\n"
-            f"NON-GUEST STATUS - LIMITED ACCESS:\n"
-            f"This user is NOT currently a registered guest. You can help them with:\n"
-            f"✓ General information about ILORA RETREATS\n"
-            f"✓ Room types (14 luxury tents) and general availability\n"
-            f"✓ Pricing ranges (USD 500-650/night full-board)\n"
-            f"✓ Location and directions (Masai Mara, near Olkiombo Airstrip)\n"
-            f"✓ Activities overview (safaris, balloons, cultural experiences)\n"
-            f"✓ Facilities overview (spa, pool, gym, dining)\n"
-            f"✓ Booking process and reservation assistance\n"
-            f"✓ General inquiry handling\n\n"
-            f"RESTRICTED - CANNOT ACCESS:\n"
-            f"✗ Detailed menu prices or in-room dining options\n"
-            f"✗ Cannot book specific spa treatments or room service\n"
-            f"✗ Cannot make in-stay arrangements\n"
-            f"✗ Cannot access guest-only services\n"
-            f"✗ Cannot view or modify existing bookings\n\n"
-            f"HOTEL DATA (Relevant Information):\n{hotel_data}\n\n"
-            f"{rules_text}\n\n"
-            f"{campaigns_text}\n\n"
-            f"GUEST QUERY: {query}\n\n"
-            f"IMPORTANT RULES:\n"
-            f"1. ✓ Be welcoming and encouraging about booking a stay\n"
-            f"2. ✓ If they ask about guest-only services (room service, spa bookings), politely explain "
-            f"they need to be a registered guest to access these services\n"
-            f"3. ✓ Encourage them to make a reservation for full access to amenities\n"
-            f"4. ✓ Provide general pricing: Full-board rates start around USD 500–650 per night\n"
-            f"5. ❌ Do NOT hallucinate. Stick to general facts about the retreat\n"
-            f"6. ✓ If they want to book, guide them to contact reservations\n"
-            f"7. ✓ Be professional, friendly, and persuasive about the unique luxury safari experience\n"
-            f"8. ✓ Emphasize sustainability, comfort, and immersive nature experience\n\n"
-            f"Provide a concise helpful response that encourages booking while answering their query accurately."
-        )
-        return prompt
+        return "".join((
+            "You are ", agent_name, self._NON_GUEST_PROMPT_INTRO,
+            hotel_data, "\n\n", rules_text, "\n\n", campaigns_text, "\n\n",
+            self._NON_GUEST_PROMPT_RULES, user_profile_block,
+            "\n\nRecent Conversation:\n", recent_conv_text,
+            "\n\nGUEST QUERY: ", query, self._NON_GUEST_PROMPT_OUTRO,
+        ))
+
+    def _format_hotel_data(self) -> str:
+        if not self.qna_rows:
+            return "No specific data available."
+        return "\n".join([str(row) for row in self.qna_rows[:10]])
 
     def _format_menu_text(self) -> str:
         if not self.menu_rows:
             return ""
-        menu_text = "\n\n📜 **MENU (Sample Items):**\n"
+        lines = ["\n\n📜 **MENU (Sample Items):**"]
         for item in self.menu_rows[:20]:
             name = item.get("Item") or item.get("Name") or ""
-            price = item.get("Price") or ""
+            if not name:
+                continue
             typ = item.get("Type") or item.get("Category") or ""
+            price = item.get("Price") or ""
             desc = item.get("Description") or item.get("Desc") or ""
-            if name:
-                entry = f"- {name}"
-                if typ:
-                    entry += f" ({typ})"
-                if price:
-                    entry += f" - {price}"
-                if desc:
-                    entry += f": {desc}"
-                menu_text += entry + "\n"
-        return menu_text
+            lines.append("".join((
+                "- ", str(name),
+                f" ({typ})" if typ else "",
+                f" - {price}" if price else "",
+                f": {desc}" if desc else "",
+            )))
+        lines.append("")
+        return "\n".join(lines)
 
     def _format_rules_text(self) -> str:
         if not self.dos_donts:
             return ""
-        rules_text = "\n\n📋 **COMMUNICATION RULES:**\n"
+        lines = ["\n\n📋 **COMMUNICATION RULES:**"]
         for entry in self.dos_donts:
             do = str(entry.get("do", "")).strip()
             dont = str(entry.get("dont", "")).strip()
             if do:
-                rules_text += f"✅ Do: {do}\n"
+                lines.append(f"✅ Do: {do}")
             if dont:
-                rules_text += f"❌ Don't: {dont}\n"
-        return rules_text
+                lines.append(f"❌ Don't: {dont}")
+        lines.append("")
+        return "\n".join(lines)
 
     def _format_campaigns_text(self) -> str:
         if not self.campaigns:
             return ""
-        campaigns_text = "\n\n📣 **ACTIVE CAMPAIGNS:**\n"
+        lines = ["\n\n📣 **ACTIVE CAMPAIGNS:**"]
         for c in self.campaigns[:5]:
             title = c.get("Name") or c.get("Title") or ""
             desc = c.get("Description") or c.get("Details") or ""
             if title or desc:
-                campaigns_text += f"- {title}"
-                if desc:
-                    campaigns_text += f": {desc}"
-                campaigns_text += "\n"
-        return campaigns_text
+                lines.append(f"- {title}: {desc}" if desc else f"- {title}")
+        lines.append("")
+        return "\n".join(lines)
 
     # ==================== LLM CALLS (UPDATED) ====================
+    _LLM_UNAVAILABLE_ANSWER = "I'm having trouble processing that right now. Please try again."
 
-    def _call_llm_groq(self, prompt: str, max_retries: int = 3) -> str:
+
+    def _stream_llm_groq(self, prompt: str, max_retries: int = 3) -> Iterator[str]:
         """
-        Preferred Groq call:
-         - Use Groq SDK streaming if available (collect chunks)
-         - Otherwise fall back to HTTP POST to Groq's OpenAI-compatible endpoint
+        Preferred Groq call, streamed to the caller:
+         - Use Groq SDK streaming if available (yield delta pieces as they arrive)
+         - Otherwise fall back to a streamed HTTP POST to Groq's OpenAI-compatible
+           endpoint, parsing the `data: {...}` SSE frames
         """
         # First try SDK streaming if available
         if GROQ_AVAILABLE:
+            emitted = False
             try:
-                # ensure api key is set in env (Groq SDK reads GROQ_API_KEY)
-                if self.llm_api_key:
-                    os.environ.setdefault("GROQ_API_KEY", self.llm_api_key)
-                client = Groq()
+                # GROQ_API_KEY was exported once in __init__ for the SDK to pick up
+                # SDK-level timeout; no worker thread is needed to bound the call
+                client = Groq().with_options(timeout=self.llm_timeout)
                 # streaming completion (sample-based)
                 completion = client.chat.completions.create(
                     model=self.llm_model,
@@ -386,7 +572,6 @@ class IloraRetreatsConciergeBot:
                     stream=True,
                     stop=None,
                 )
-                collected = []
                 for chunk in completion:
                     # sample SDK chunk structure per your sample: chunk.choices[0].delta.content
                     try:
@@ -403,56 +588,74 @@ class IloraRetreatsConciergeBot:
                         except Exception:
                             piece = ""
                     if piece:
-                        collected.append(piece)
-                text = "".join(collected).strip()
-                if text:
-                    return text
-                # If streaming produced nothing, fall back to non-streaming below
+                        emitted = True
+                        yield piece
+                if emitted:
+                    return
+                # If streaming produced nothing, fall back to HTTP below
             except Exception as e:
                 logger.exception("Groq SDK streaming failed, falling back to HTTP: %s", e)
+                # Part of the answer already reached the caller - can't restart it
+                if emitted:
+                    return
 
-        # Fallback: HTTP POST to Groq OpenAI-compatible endpoint
+        # Fallback: streamed HTTP POST to Groq OpenAI-compatible endpoint
         payload = {
             "model": self.llm_model,
             "messages": [{"role": "user", "content": prompt}],
             "temperature": 0.7,
             "max_tokens": 1024,
-            "top_p": 1
+            "top_p": 1,
+            "stream": True,
         }
+        if not self.llm_headers:
+            logger.error("No Groq API key available for HTTP fallback.")
+            yield self._LLM_UNAVAILABLE_ANSWER
+            return
+        emitted = False
         for attempt in range(max_retries):
             try:
-                if not self.llm_headers:
-                    logger.error("No Groq API key available for HTTP fallback.")
-                    break
-                resp = requests.post(self.llm_api_url, headers=self.llm_headers, json=payload, timeout=self.llm_timeout)
-                if resp.status_code == 200:
-                    data = resp.json()
-                    # OpenAI-compatible: choices[0].message.content
-                    try:
-                        return data["choices"][0]["message"]["content"].strip()
-                    except Exception:
-                        # Some endpoints return different shapes
-                        # Try other plausible locations
-                        if isinstance(data, dict) and "text" in data:
-                            return str(data["text"]).strip()
-                        return json.dumps(data)[:2000]
-                elif resp.status_code in (429, 503) and attempt < max_retries - 1:
-                    # rate limited or model loading - retry with backoff
-                    sleep_for = 2 ** attempt
-                    logger.warning("Groq HTTP retry %s after %ss (status=%s)", attempt + 1, sleep_for, resp.status_code)
-                    time.sleep(sleep_for)
-                    continue
-                else:
-                    logger.error("Groq HTTP error %s: %s", resp.status_code, resp.text)
-                    break
+                with self._llm_http.stream("POST", self.llm_api_url, json=payload) as resp:
+                    if resp.status_code == 200:
+                        for line in resp.iter_lines():
+                            # SSE frames look like `data: {...}`; ignore keep-alives/comments
+                            if not line or not line.startswith("data:"):
+                                continue
+                            data = line[len("data:"):].strip()
+                            if data == "[DONE]":
+                                break
+                            try:
+                                frame = _json_loads(data)
+                                piece = frame["choices"][0].get("delta", {}).get("content") or ""
+                            except Exception:
+                                continue
+                            if piece:
+                                emitted = True
+                                yield piece
+                        if emitted:
+                            return
+                        logger.error("Groq HTTP stream returned no content.")
+                        break
+                    elif resp.status_code in (429, 503) and attempt < max_retries - 1:
+                        # rate limited or model loading - retry with backoff
+                        sleep_for = 2 ** attempt
+                        logger.warning("Groq HTTP retry %s after %ss (status=%s)", attempt + 1, sleep_for, resp.status_code)
+                        time.sleep(sleep_for)
+                        continue
+                    else:
+                        resp.read()
+                        logger.error("Groq HTTP error %s: %s", resp.status_code, resp.text)
+                        break
             except Exception as e:
                 logger.exception("Groq HTTP call failed on attempt %s: %s", attempt + 1, e)
+                if emitted:
+                    return
                 if attempt < max_retries - 1:
                     time.sleep(2 ** attempt)
                     continue
                 break
         # If all else fails:
-        return "I'm having trouble processing that right now. Please try again."
+        yield self._LLM_UNAVAILABLE_ANSWER
 
     def _call_llm_huggingface(self, prompt: str, max_retries: int = 3) -> str:
         """Call HuggingFace API (unchanged from original)."""
@@ -468,12 +671,7 @@ class IloraRetreatsConciergeBot:
         }
         for attempt in range(max_retries):
             try:
-                response = requests.post(
-                    self.llm_api_url,
-                    headers=self.llm_headers,
-                    json=payload,
-                    timeout=self.llm_timeout
-                )
+                response = self._llm_http.post(self.llm_api_url, json=payload)
                 if response.status_code == 200:
                     result = response.json()
                     if isinstance(result, list) and len(result) > 0:
@@ -501,20 +699,84 @@ class IloraRetreatsConciergeBot:
                 return "I encountered an error. Please try again."
         return "Unable to process your request. Please try again later."
 
-    def _run_with_timeout(self, fn, args: tuple = (), timeout: float = 5.0):
-        future = self._executor.submit(fn, *args)
+    # ==================== ANSWER CACHE ====================
+    # Words that point back at earlier turns; a query containing one is answered from the
+    # conversation and is never served from (or stored in) the answer cache
+    _CONTEXT_REFERENCE_WORDS = frozenset({
+        "it", "its", "that", "this", "these", "those", "they", "them", "their", "there",
+        "he", "she", "him", "her", "one", "ones", "same", "also", "too", "more", "again",
+        "else", "another", "other", "above", "previous", "earlier", "before", "instead",
+        "yes", "no", "ok", "okay", "sure", "and", "then",
+    })
+
+    def _is_context_free(self, query: str) -> bool:
+        """True when the query reads the same on any turn (no words referring back to the chat)."""
+        tokens = self._QUERY_TOKEN_RE.findall(query.lower())
+        return bool(tokens) and self._CONTEXT_REFERENCE_WORDS.isdisjoint(tokens)
+
+    def _answer_cache_key(self, user_type: str, query: str, agent_name: str, user_profile_text: str) -> tuple:
+        """
+        (user_type, sheet data version, hash of the per-user prompt context, normalized query).
+        Only built for context-free queries, so the recent conversation is left out of the key
+        and a question repeated later in a session (or by another user) can still hit.
+        """
+        context = "\x1f".join((agent_name, user_profile_text))
+        context_hash = hashlib.sha1(context.encode("utf-8")).hexdigest()
+        return (user_type, self._prompt_cache_version, context_hash, " ".join(query.lower().split()))
+
+    def _embed_query(self, text: str):
+        if self._embedder is None:
+            from sentence_transformers import SentenceTransformer
+            self._embedder = SentenceTransformer(self.semantic_cache_model)
+        return self._embedder.encode(text, normalize_embeddings=True)
+
+    def _get_cached_answer(self, key: tuple):
+        """Return (answer or None, query embedding or None) for the given cache key."""
+        with self._answer_cache_lock:
+            entry = self._answer_cache.get(key)
+            if entry is not None:
+                self._answer_cache.move_to_end(key)
+                return entry[0], None
+        if not self.semantic_cache_enabled:
+            return None, None
+
         try:
-            return future.result(timeout=timeout)
-        except FuturesTimeoutError:
-            future.cancel()
-            raise TimeoutError(f"Operation timed out after {timeout}s")
+            embedding = self._embed_query(key[3])
+        except Exception as e:
+            logger.warning(f"Semantic cache disabled, embedding failed: {e}")
+            self.semantic_cache_enabled = False
+            return None, None
+
+        # Semantic match only among entries that share the same user type, data and context
+        with self._answer_cache_lock:
+            candidates = [(k, v) for k, v in self._answer_cache.items() if k[:3] == key[:3] and v[1] is not None]
+        if not candidates:
+            return None, embedding
+        similarities = np.stack([v[1] for _, v in candidates]) @ embedding
+        best = int(np.argmax(similarities))
+        if similarities[best] >= self.semantic_cache_threshold:
+            return candidates[best][1][0], embedding
+        return None, embedding
+
+    def _store_cached_answer(self, key: tuple, answer: str, embedding=None):
+        with self._answer_cache_lock:
+            self._answer_cache[key] = (answer, embedding)
+            self._answer_cache.move_to_end(key)
+            while len(self._answer_cache) > self.answer_cache_size:
+                self._answer_cache.popitem(last=False)
 
     # ==================== MAIN ASK METHOD ====================
-    def ask(self, query: str, user_type: str = "non-guest", user_session=None, session_key=None) -> str:
+    def ask_stream(self, query: str, user_type: str = "non-guest", user_session=None, session_key=None) -> Iterator[str]:
+        """
+        Streaming variant of `ask`: yields answer pieces as the LLM produces them.
+        The full answer is saved to chat history once the stream is exhausted.
+        """
         print(f"[DEBUG] >>> ask: {query} (user_type={user_type})")
 
         # Extract session data
         sess_key, sess_obj = self._extract_session_object(user_session, session_key)
+        if isinstance(sess_key, str):
+            sess_key = sys.intern(sess_key)
 
         # Refresh sheets if needed
         if self.use_sheet:
@@ -524,38 +786,27 @@ class IloraRetreatsConciergeBot:
                 logger.warning(f"Sheet refresh failed: {e}")
 
         # Get agent name
-        agent_name = "ILORA Concierge"
-        try:
-            agents_file = os.path.join("data", "agents.json")
-            if os.path.exists(agents_file):
-                with open(agents_file, "r", encoding="utf-8") as f:
-                    agents = json.load(f)
-                for agent in agents:
-                    if agent.get("Name") == "Front Desk":
-                        agent_name = agent.get("agent_name", agent_name)
-        except Exception:
-            pass
+        agent_name = self._get_agent_name()
+
+        # Inputs shared by both prompts (sheet blocks come pre-formatted from the prompt cache)
+        hotel_data = self._cached_hotel_data
+        user_profile_text = self._format_user_session_summary(sess_obj) if sess_obj else ""
+        recent_conversation = self._format_conversation_for_prompt(self.get_recent_history(sess_key)) if sess_key else ""
+        rules_text = self._cached_rules
 
         # Build prompt based on user type
         if user_type == "guest":
-            hotel_data = "\n".join(str(row) for row in self.qna_rows[:10]) if self.qna_rows else "No specific data available."
-            user_profile_text = self._format_user_session_summary(sess_obj) if sess_obj else ""
-            recent_conversation = self._format_conversation_for_prompt(self.get_recent_history(sess_key)) if sess_key else ""
-            menu_text = self._format_menu_text()
-            rules_text = self._format_rules_text()
-            campaigns_text = self._format_campaigns_text()
+            # Skip the menu/campaign blocks when the query clearly isn't about them
+            q_tokens = set(self._QUERY_TOKEN_RE.findall(query.lower()))
+            menu_text = self._cached_menu if q_tokens & self._MENU_KEYWORDS else ""
+            campaigns_text = self._cached_campaigns if q_tokens & self._CAMPAIGN_KEYWORDS else ""
 
             prompt = self._build_guest_prompt(
                 hotel_data, query, user_profile_text, recent_conversation,
                 menu_text, rules_text, campaigns_text, agent_name
             )
         else:
-            hotel_data = "\n".join(str(row) for row in self.qna_rows[:10]) if self.qna_rows else "No specific data available."
-            user_profile_text = self._format_user_session_summary(sess_obj) if sess_obj else ""
-            recent_conversation = self._format_conversation_for_prompt(self.get_recent_history(sess_key)) if sess_key else ""
-            menu_text = self._format_menu_text()
-            rules_text = self._format_rules_text()
-            campaigns_text = self._format_campaigns_text()
+            campaigns_text = self._cached_campaigns
 
             # NOTE: original code used guest prompt call here with wrong arguments —
             # I preserved behaviour but pass through an appropriate non-guest prompt
@@ -563,22 +814,49 @@ class IloraRetreatsConciergeBot:
                 query, recent_conversation, agent_name, hotel_data, rules_text, campaigns_text, user_profile_text
             )
 
-        # Call LLM
+        # Serve repeated context-free questions from the answer cache without calling the LLM
+        cache_key = None
+        if self._is_context_free(query):
+            cache_key = self._answer_cache_key(user_type, query, agent_name, user_profile_text)
+        cached_answer, query_embedding = self._get_cached_answer(cache_key) if cache_key else (None, None)
+
+        # Call LLM, forwarding pieces to the caller as they arrive
+        collected = []
+        # Only successful Groq answers are cached; the HuggingFace path reports errors as plain text
+        cacheable = self.use_groq and cache_key is not None
         try:
-            if self.use_groq:
-                answer = self._call_llm_groq(prompt)
+            if cached_answer is not None:
+                cacheable = False
+                collected.append(cached_answer)
+                yield cached_answer
+            elif self.use_groq:
+                for piece in self._stream_llm_groq(prompt):
+                    collected.append(piece)
+                    yield piece
             else:
                 answer = self._call_llm_huggingface(prompt)
+                collected.append(answer)
+                yield answer
         except Exception as e:
             logger.error(f"LLM call failed: {e}")
-            answer = "I'm sorry, I couldn't process that right now. Please try again."
+            cacheable = False
+            if not collected:
+                answer = "I'm sorry, I couldn't process that right now. Please try again."
+                collected.append(answer)
+                yield answer
+
+        answer = "".join(collected).strip()
+        if cacheable and answer and answer != self._LLM_UNAVAILABLE_ANSWER:
+            self._store_cached_answer(cache_key, answer, query_embedding)
 
         # Save to chat history
         if sess_key:
             self.add_chat_message(sess_key, "user", query)
             self.add_chat_message(sess_key, "assistant", answer)
 
-        return answer
+    def ask(self, query: str, user_type: str = "non-guest", user_session=None, session_key=None) -> str:
+        """Blocking wrapper around `ask_stream` for callers that need the whole answer."""
+        return "".join(self.ask_stream(query, user_type=user_type, user_session=user_session, session_key=session_key)).strip()
 
 
 '''
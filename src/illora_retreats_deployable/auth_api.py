@@ -1,7 +1,6 @@
 import os
-import uuid
 import json
-import random
+import secrets
 import logging
 import asyncio
 import requests
@@ -10,18 +9,34 @@ from datetime import date, datetime, timedelta
 
 from fastapi import FastAPI, Depends, UploadFile, File, HTTPException, Query, Request, Body
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.responses import StreamingResponse, ORJSONResponse, HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field
 from config import Config
-from services.gsheets_helper import append_row_to_sheet, find_row_by_email, update_row_by_email
+from services.gsheets_helper import append_row_to_sheet, update_row_by_email
+from auth_helper import (
+    get_cached_row, invalidate_cached_row, check_password, hash_password, stored_password,
+    issue_token, decode_token, require_jwt_secret, JWT_REMEMBER_TTL_SECONDS,
+)
+import jwt
+
+try:
+    from pyinstrument import Profiler
+    PYINSTRUMENT_AVAILABLE = True
+except Exception:
+    PYINSTRUMENT_AVAILABLE = False
 
 # ------------------------- Logging setup -------------------------
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Fail at startup rather than on the first login: tokens are signed with JWT_SECRET and every
+# worker must share it
+require_jwt_secret()
+
 # ------------------------- FastAPI app -------------------------
-app = FastAPI(title="Illora Auth API", version="1.0.0")
+app = FastAPI(title="Illora Auth API", version="1.0.0", default_response_class=ORJSONResponse)
 
 # ------------------------- CORS -------------------------
 FRONTEND_ORIGINS = [
@@ -36,10 +51,25 @@ app.add_middleware(
     allow_origins=FRONTEND_ORIGINS,
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    allow_headers=["*"],
-    expose_headers=["*"],
+    allow_headers=["Authorization", "Content-Type"],
+    max_age=86400,  # browsers cache the preflight for a day
 )
 
+# ------------------------- Profiling (opt-in) -------------------------
+# With PROFILING set, any request carrying ?profile=1 returns a pyinstrument HTML report
+if os.getenv("PROFILING") and PYINSTRUMENT_AVAILABLE:
+    @app.middleware("http")
+    async def profile_mw(request: Request, call_next):
+        if not request.query_params.get("profile"):
+            return await call_next(request)
+        profiler = Profiler(async_mode="enabled")
+        profiler.start()
+        await call_next(request)
+        profiler.stop()
+        return HTMLResponse(profiler.output_html())
+elif os.getenv("PROFILING"):
+    logger.warning("PROFILING is set but pyinstrument is not installed; request profiling disabled")
+
 # ------------------------- Models -------------------------
 class SignupReq(BaseModel):
     name: str = Field(..., min_length=2, description="User's full name")
@@ -71,15 +101,33 @@ def push_row_to_sheet(sheet_name: str, row_data: Dict[str, Any]) -> Dict[str, An
         logger.exception("push_row_to_sheet failed: %s", e)
         return {"success": False, "message": str(e)}
 
+# ------------------------- Auth dependency -------------------------
+_bearer = HTTPBearer(auto_error=False)
+
+def get_current_user(creds: Optional[HTTPAuthorizationCredentials] = Depends(_bearer)) -> Dict[str, Any]:
+    """Resolve the Bearer JWT to the user's Client_workflow row (both lookups are TTL-cached)."""
+    if creds is None:
+        raise HTTPException(status_code=401, detail={"message": "Missing bearer token"})
+    try:
+        payload = decode_token(creds.credentials)
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=401, detail={"message": "Invalid or expired token"})
+
+    row = get_cached_row(payload.get("sub", ""))
+    if not row:
+        raise HTTPException(status_code=401, detail={"message": "User not found"})
+    return row
+
 # ------------------------- Endpoints -------------------------
-@app.post("/auth/login", tags=["authentication"])
+@app.post("/auth/login", tags=["authentication"], response_model=None)
 async def login(req: LoginReq):
     """Verify user credentials against the Google Sheet"""
     logger.info(f"Login attempt for username: {req.username}")
     
     try:
-        # Use direct Sheets lookup instead of Apps Script webapp
-        row = find_row_by_email("Client_workflow", req.username)
+        # Sheets lookup (served from the in-process TTL cache on repeat logins); blocking
+        # Sheets and bcrypt work runs in the thread pool so the event loop stays free
+        row = await asyncio.to_thread(get_cached_row, req.username)
         if not row:
             logger.warning("User %s not found in Client_workflow", req.username)
             raise HTTPException(
@@ -87,14 +135,19 @@ async def login(req: LoginReq):
                 detail={"message": "User not registered. Please sign up first.", "needsSignup": True},
             )
 
-        pw = row.get("Password") or row.get("password") or row.get("Password Hash") or row.get("password_hash")
-        if not pw or str(pw) != str(req.password):
+        if not await asyncio.to_thread(check_password, req.username, req.password, stored_password(row)):
             logger.warning("Invalid password for user %s", req.username)
             raise HTTPException(status_code=401, detail={"message": "Invalid credentials"})
 
-        token = uuid.uuid4().hex if req.remember else None
+        token = issue_token(req.username)
         logger.info("User %s logged in successfully (sheets)", req.username)
-        return {"username": req.username, "remember_token": token, "userData": row}
+        return {
+            "username": req.username,
+            "access_token": token,
+            # longer-lived token the client keeps for "remember me"
+            "remember_token": issue_token(req.username, ttl=JWT_REMEMBER_TTL_SECONDS) if req.remember else None,
+            "userData": row,
+        }
             
     except HTTPException:
         raise
@@ -102,14 +155,19 @@ async def login(req: LoginReq):
         logger.error(f"Login error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/auth/signup", tags=["authentication"])
+@app.get("/auth/me", tags=["authentication"], response_model=None)
+async def me(user: Dict[str, Any] = Depends(get_current_user)):
+    """Return the signed-in user's row without a fresh Sheets lookup"""
+    return {"userData": user}
+
+@app.post("/auth/signup", tags=["authentication"], response_model=None)
 async def signup(req: SignupReq = Body(...)):
     """Register a new user and add them to the Client_workflow sheet"""
     logger.info(f"Received signup request for username: {req.username}")
     
     try:
         # Generate unique Client Id
-        client_id = f"ILR-{datetime.utcnow().year}-{random.randint(1000,9999)}"
+        client_id = f"ILR-{datetime.utcnow().year}-{secrets.token_hex(3).upper()}"
         workflow_stage = "Registered"
         
         # Prepare row data for Client_workflow sheet
@@ -117,7 +175,7 @@ async def signup(req: SignupReq = Body(...)):
             "Client Id": client_id,
             "Name": req.name,
             "Email": req.username,  # Map username to Email column
-            "Password": req.password,
+            "Password": await asyncio.to_thread(hash_password, req.password),
             "Booking Id": "",
             "Workflow Stage": workflow_stage,
             "Room Alloted": "",
@@ -127,9 +185,10 @@ async def signup(req: SignupReq = Body(...)):
         }
         
         # Add user to Google Sheet
-        resp = push_row_to_sheet("Client_workflow", row_data)
+        resp = await asyncio.to_thread(push_row_to_sheet, "Client_workflow", row_data)
         
         if resp.get("success") or resp.get("ok") or resp.get("status_code") == 200:
+            invalidate_cached_row(req.username)
             logger.info(f"User {req.username} registered successfully with client ID {client_id}")
             return {
                 "success": True,
@@ -146,7 +205,7 @@ async def signup(req: SignupReq = Body(...)):
         logger.error(f"Error in signup endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))     
 
-@app.post("/auth/update-workflow", tags=["authentication"])
+@app.post("/auth/update-workflow", tags=["authentication"], response_model=None)
 async def update_workflow(req: UpdateWorkflowReq):
     """Update a user's workflow stage in the Client_workflow sheet"""
     logger.info(f"Updating workflow stage for user {req.username} to {req.stage}")
@@ -158,10 +217,11 @@ async def update_workflow(req: UpdateWorkflowReq):
         if req.id_proof_link:
             updates["Id Link"] = req.id_proof_link
 
-        result = update_row_by_email("Client_workflow", req.username, updates)
+        result = await asyncio.to_thread(update_row_by_email, "Client_workflow", req.username, updates)
         if not result.get("success"):
             logger.error("Failed to update workflow for %s: %s", req.username, result.get("message"))
             raise HTTPException(status_code=400, detail=result.get("message", "Failed to update"))
+        invalidate_cached_row(req.username)
 
         logger.info("Successfully updated workflow stage for user %s", req.username)
         return {"success": True, "message": f"Workflow stage updated to {req.stage}", "userData": result.get("userData")}
@@ -169,4 +229,15 @@ async def update_workflow(req: UpdateWorkflowReq):
         raise
     except Exception as e:
         logger.error("Error updating workflow: %s", str(e))
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(
+        "auth_api:app",
+        host="0.0.0.0",
+        port=int(os.environ.get("PORT", 8001)),
+        workers=int(os.environ.get("WEB_CONCURRENCY", 1)),
+        loop="auto",
+        http="auto",
+    )
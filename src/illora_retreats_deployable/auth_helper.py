@@ -1,5 +1,12 @@
+import hmac
+import time
+import hashlib
 import logging
+import threading
 from typing import Optional, Tuple, Dict, Any
+import bcrypt
+import jwt
+from cachetools import TTLCache
 from config import Config
 from services.gsheets_helper import find_row_by_email
 
@@ -8,6 +15,124 @@ CLIENT_WORKFLOW_SHEET = "Client_workflow"
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Login-path cache of Client_workflow rows keyed by lowercased email. Misses are kept in a
+# separate, shorter-lived cache so a fresh signup becomes visible quickly.
+_user_cache: TTLCache = TTLCache(maxsize=10000, ttl=60)
+_missing_user_cache: TTLCache = TTLCache(maxsize=10000, ttl=10)
+_user_cache_lock = threading.Lock()
+
+# bcrypt is deliberately slow, so a successful (or failed) check is remembered for a few minutes
+BCRYPT_ROUNDS = 12
+_pw_cache: TTLCache = TTLCache(maxsize=10000, ttl=300)
+_pw_cache_lock = threading.Lock()
+
+
+# Sheet headers that may hold the password, in lookup order
+PASSWORD_KEYS = ("Password", "password", "Password Hash", "password_hash")
+
+
+def stored_password(row: Dict[str, Any]) -> Any:
+    """Return the first non-empty password column of a Client_workflow row."""
+    for key in PASSWORD_KEYS:
+        value = row.get(key)
+        if value:
+            return value
+    return None
+
+
+def hash_password(password: str) -> str:
+    """Return a bcrypt hash of `password` suitable for the sheet's Password column."""
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode()
+
+
+def check_password(email: str, password: str, stored: Any) -> bool:
+    """Check `password` against the stored value: a bcrypt hash, or a legacy plain-text password."""
+    if not stored or password is None:
+        return False
+    stored = str(stored)
+    # the stored value is part of the key so a password change never hits a stale entry
+    key = hashlib.sha256(f"{(email or '').strip().lower()}|{password}|{stored}".encode()).hexdigest()
+    with _pw_cache_lock:
+        cached = _pw_cache.get(key)
+    if cached is not None:
+        return cached
+
+    if stored.startswith("$2"):
+        try:
+            ok = bcrypt.checkpw(password.encode(), stored.encode())
+        except ValueError:
+            ok = False
+    else:
+        ok = hmac.compare_digest(stored.encode(), password.encode())
+    with _pw_cache_lock:
+        _pw_cache[key] = ok
+    return ok
+
+
+JWT_ALGORITHM = "HS256"
+JWT_TTL_SECONDS = getattr(Config, "JWT_TTL_SECONDS", 3600)
+JWT_REMEMBER_TTL_SECONDS = getattr(Config, "JWT_REMEMBER_TTL_SECONDS", 30 * 24 * 3600)
+_jwt_secret = getattr(Config, "JWT_SECRET", None)
+
+
+def require_jwt_secret() -> str:
+    """Return JWT_SECRET. Raises RuntimeError if it is unset; every worker must share one secret."""
+    if not _jwt_secret:
+        raise RuntimeError("JWT_SECRET is not set; tokens cannot be issued or verified")
+    return _jwt_secret
+
+# Decoded payloads keyed by sha256(token), so repeat requests skip the signature check
+_token_cache: TTLCache = TTLCache(maxsize=10000, ttl=30)
+_token_cache_lock = threading.Lock()
+
+
+def issue_token(username: str, ttl: Optional[int] = None) -> str:
+    """Return a signed JWT whose subject is `username`, valid for `ttl` seconds (JWT_TTL_SECONDS by default)."""
+    exp = int(time.time()) + (ttl or JWT_TTL_SECONDS)
+    return jwt.encode({"sub": username, "exp": exp}, require_jwt_secret(), algorithm=JWT_ALGORITHM)
+
+
+def decode_token(token: str) -> Dict[str, Any]:
+    """Verify `token` and return its payload. Raises jwt.InvalidTokenError if it is bad or expired."""
+    key = hashlib.sha256(token.encode()).hexdigest()
+    with _token_cache_lock:
+        payload = _token_cache.get(key)
+    if payload is not None and payload.get("exp", 0) > time.time():
+        return payload
+
+    payload = jwt.decode(token, require_jwt_secret(), algorithms=[JWT_ALGORITHM])
+    with _token_cache_lock:
+        _token_cache[key] = payload
+    return payload
+
+
+def get_cached_row(email: str) -> Optional[Dict[str, Any]]:
+    """Return the Client_workflow row for `email`, hitting Google Sheets only on a cache miss."""
+    key = (email or "").strip().lower()
+    with _user_cache_lock:
+        row = _user_cache.get(key)
+        if row is not None:
+            return row
+        if key in _missing_user_cache:
+            return None
+
+    row = find_row_by_email(CLIENT_WORKFLOW_SHEET, email)
+    with _user_cache_lock:
+        if row:
+            _user_cache[key] = row
+        else:
+            _missing_user_cache[key] = True
+    return row
+
+
+def invalidate_cached_row(email: str) -> None:
+    """Drop any cached row (or cached miss) for `email` after the sheet was written."""
+    key = (email or "").strip().lower()
+    with _user_cache_lock:
+        _user_cache.pop(key, None)
+        _missing_user_cache.pop(key, None)
+
+
 def verify_user_credentials(username: str, password: str) -> Tuple[bool, bool, Optional[Dict[str, Any]], str]:
     """
     Verify user credentials against the Google Sheet
@@ -15,15 +140,12 @@ def verify_user_credentials(username: str, password: str) -> Tuple[bool, bool, O
     """
     try:
         logger.info("Attempting login with username: %s", username)
-        row = find_row_by_email(CLIENT_WORKFLOW_SHEET, username)
+        row = get_cached_row(username)
         if not row:
             logger.warning("verify_user_credentials: user not found: %s", username)
             return False, False, None, "User not found"
 
-        pw = row.get("Password") or row.get("password") or row.get("Password Hash") or row.get("password_hash")
-        verified = False
-        if pw and str(pw) == str(password):
-            verified = True
+        verified = check_password(username, password, stored_password(row))
 
         message = "Verified" if verified else "Invalid credentials"
         logger.info("Authentication result - Found: True, Verified: %s", verified)
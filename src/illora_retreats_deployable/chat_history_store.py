@@ -1,63 +1,133 @@
+import time
 import sqlite3
-import json
+import orjson
+import threading
+from functools import lru_cache
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 import os
 
 CHAT_DB_PATH = "illora_chat_history.db"
 
+# One shared connection for the process (autocommit, WAL); writes are serialized by _LOCK
+_CONN = sqlite3.connect(CHAT_DB_PATH, check_same_thread=False, isolation_level=None)
+_CONN.execute("PRAGMA journal_mode=WAL")
+_CONN.execute("PRAGMA synchronous=NORMAL")
+_CONN.execute("PRAGMA temp_store=MEMORY")
+_CONN.execute("PRAGMA mmap_size=268435456")
+_LOCK = threading.Lock()
+
+_APPEND_SQL = """
+    INSERT INTO chat_messages(email, seq, ts, payload)
+    VALUES(?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM chat_messages WHERE email=? COLLATE NOCASE), ?, ?)
+"""
+
+@lru_cache(maxsize=1)
+def _iso_second(sec: int) -> str:
+    return datetime.utcfromtimestamp(sec).isoformat()
+
+def _now_iso() -> str:
+    """UTC ISO timestamp at second resolution, formatted at most once per wall-clock second."""
+    return _iso_second(int(time.time()))
+
 def init_chat_db():
     """Initialize the chat history database."""
-    conn = sqlite3.connect(CHAT_DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS chat_history(
-        email TEXT PRIMARY KEY,
-        messages TEXT NOT NULL,
-        last_updated TEXT NOT NULL
-    )""")
-    conn.commit()
-    conn.close()
+    with _LOCK:
+        # Append-only log: one row per message, so a new turn is a single INSERT.
+        # Emails compare case-insensitively in the B-tree, so callers never lowercase.
+        _CONN.execute("""
+        CREATE TABLE IF NOT EXISTS chat_messages(
+            email TEXT NOT NULL COLLATE NOCASE,
+            seq INTEGER NOT NULL,
+            ts TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            PRIMARY KEY(email, seq)
+        )""")
+        # Tables created before the NOCASE column get a case-insensitive lookup index instead
+        (ddl,) = _CONN.execute(
+            "SELECT sql FROM sqlite_master WHERE type='table' AND name='chat_messages'"
+        ).fetchone()
+        if "NOCASE" not in ddl.upper():
+            _CONN.execute(
+                "CREATE INDEX IF NOT EXISTS idx_chat_messages_email_nocase ON chat_messages(email COLLATE NOCASE, seq)"
+            )
+        _migrate_legacy_history()
+
+def _migrate_legacy_history():
+    """Move rows of the old one-blob-per-user `chat_history` table into `chat_messages`."""
+    legacy = _CONN.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name='chat_history'"
+    ).fetchone()
+    if not legacy:
+        return
+    _CONN.execute("BEGIN")
+    try:
+        for email, messages, last_updated in _CONN.execute(
+            "SELECT email, messages, last_updated FROM chat_history"
+        ).fetchall():
+            try:
+                messages = orjson.loads(messages)
+            except Exception:
+                continue
+            _CONN.executemany(
+                "INSERT OR IGNORE INTO chat_messages(email, seq, ts, payload) VALUES(?,?,?,?)",
+                [(email, seq, last_updated, orjson.dumps(msg).decode()) for seq, msg in enumerate(messages, start=1)],
+            )
+        _CONN.execute("DROP TABLE chat_history")
+        _CONN.execute("COMMIT")
+    except Exception:
+        _CONN.execute("ROLLBACK")
+        raise
+
+def append_chat_message(email: str, message: Dict[str, Any]):
+    """Append one message to a user's chat history."""
+    if not email:
+        return
+
+    with _LOCK:
+        _CONN.execute(_APPEND_SQL, (email, email, _now_iso(), orjson.dumps(message).decode()))
 
 def save_chat_history(email: str, messages: List[Dict[str, Any]]):
-    """Save chat history for a user."""
+    """Replace the whole chat history for a user (prefer append_chat_message per turn)."""
     if not email:
         return
-    
-    conn = sqlite3.connect(CHAT_DB_PATH)
-    c = conn.cursor()
-    c.execute(
-        "INSERT OR REPLACE INTO chat_history(email, messages, last_updated) VALUES(?,?,?)",
-        (email.lower(), json.dumps(messages), datetime.utcnow().isoformat())
-    )
-    conn.commit()
-    conn.close()
+
+    ts = _now_iso()
+    with _LOCK:
+        _CONN.execute("BEGIN")
+        try:
+            _CONN.execute("DELETE FROM chat_messages WHERE email=? COLLATE NOCASE", (email,))
+            _CONN.executemany(
+                "INSERT INTO chat_messages(email, seq, ts, payload) VALUES(?,?,?,?)",
+                [(email, seq, ts, orjson.dumps(msg).decode()) for seq, msg in enumerate(messages, start=1)],
+            )
+            _CONN.execute("COMMIT")
+        except Exception:
+            _CONN.execute("ROLLBACK")
+            raise
 
 def load_chat_history(email: str) -> List[Dict[str, Any]]:
     """Load chat history for a user."""
     if not email:
         return []
-    
-    conn = sqlite3.connect(CHAT_DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT messages FROM chat_history WHERE email=?", (email.lower(),))
-    row = c.fetchone()
-    conn.close()
-    
-    if row:
+
+    with _LOCK:
+        rows = _CONN.execute(
+            "SELECT payload FROM chat_messages WHERE email=? COLLATE NOCASE ORDER BY seq", (email,)
+        ).fetchall()
+
+    messages = []
+    for (payload,) in rows:
         try:
-            return json.loads(row[0])
+            messages.append(orjson.loads(payload))
         except Exception:
-            return []
-    return []
+            continue
+    return messages
 
 def clear_chat_history(email: str):
     """Clear chat history for a user."""
     if not email:
         return
-    
-    conn = sqlite3.connect(CHAT_DB_PATH)
-    c = conn.cursor()
-    c.execute("DELETE FROM chat_history WHERE email=?", (email.lower(),))
-    conn.commit()
-    conn.close()
\ No newline at end of file
+
+    with _LOCK:
+        _CONN.execute("DELETE FROM chat_messages WHERE email=? COLLATE NOCASE", (email,))
@@ -38,6 +38,15 @@ class Config:
     # ------------------------
     STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY")
 
+    # ------------------------
+    # Auth tokens (JWT)
+    # ------------------------
+    JWT_SECRET = os.getenv("JWT_SECRET")
+    JWT_TTL_SECONDS = int(os.getenv("JWT_TTL_SECONDS", "3600"))
+    JWT_REMEMBER_TTL_SECONDS = int(os.getenv("JWT_REMEMBER_TTL_SECONDS", str(30 * 24 * 3600)))
+    # Signs the Flask session cookie that carries the web chat session id (twilio_webhook /chat/stream)
+    FLASK_SECRET_KEY = os.getenv("FLASK_SECRET_KEY")
+
     # ------------------------
     # Data paths
     # ------------------------
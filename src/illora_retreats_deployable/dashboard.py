@@ -3,10 +3,14 @@
 import pandas as pd
 import streamlit as st
 import os
+import time
 import plotly.express as px
-import re
+import csv
 from datetime import datetime, date
-import json
+import orjson
+import httpx
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import helper.summarizer as summarizer
 import uuid
 
@@ -21,22 +25,114 @@ st.title("🏨 Illora Retreats – Concierge AI Admin Dashboard")
 # --- Helpers ---
 def load_json(path, default):
     if not os.path.exists(path):
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(default, f, indent=2)
-    with open(path, "r", encoding="utf-8") as f:
+        save_json(path, default)
+    with open(path, "rb") as f:
         try:
-            return json.load(f)
+            return orjson.loads(f.read())
         except:
             return default
 
 def save_json(path, data):
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+    with open(path, "wb") as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+
+@st.cache_data(show_spinner=False)
+def _load_json_cached(path, mtime, default):
+    return load_json(path, default)
+
+def load_json_cached(path, default):
+    """load_json memoized until the file's mtime changes; each call gets its own copy."""
+    if not os.path.exists(path):
+        save_json(path, default)
+    return _load_json_cached(path, os.path.getmtime(path), default)
+
+@st.cache_data(show_spinner=False)
+def load_logs(path, mtime):
+    """Parse bot.log into the Analytics DataFrame; `mtime` only keys the cache."""
+    # Every line is read whole and split with vectorized string ops, so lines with any number
+    # of "|" (free text in the input/response) are kept; chat lines (see logger.log_chat) have 8+ fields.
+    with open(path, "r", encoding="ISO-8859-1") as f:
+        lines = pd.Series(f.read().split("\n"), dtype=object)
+    parts = lines.str.strip().str.split("|", expand=True)
+    if parts.shape[1] < 8:
+        parts = parts.reindex(columns=range(8))
+    keep = parts[7].notna()
+    df = parts.loc[keep, [0, 3, 4, 5, 6, 7]].apply(lambda col: col.str.strip())
+    df.columns = ["Timestamp", "Source", "Session ID", "User Input", "Response", "Guest Type"]
+    # Intent is whatever follows "Intent: " on the line
+    df.insert(5, "Intent", lines[keep].str.extract(r"Intent: (.+)", expand=False).fillna("Unknown"))
+    df = df.reset_index(drop=True)
+    # Few distinct values repeated on every row: store as integer codes
+    for col in ("Source", "Intent", "Guest Type"):
+        df[col] = df[col].astype("category")
+    df["Timestamp"] = pd.to_datetime(df["Timestamp"], errors="coerce")
+    df["Date"] = df["Timestamp"].dt.date
+    return df
+
+@st.cache_data(show_spinner=False)
+def log_aggregates(path, mtime):
+    """Sorted filter choices plus message counts per (Source, Intent, Guest Type, Date), built once per log version."""
+    df = load_logs(path, mtime)
+    sources = sorted(df["Source"].unique().tolist())
+    intents = sorted(df["Intent"].unique().tolist())
+    counts = (
+        df.groupby(["Source", "Intent", "Guest Type", "Date"], dropna=False, observed=True)
+        .size()
+        .reset_index(name="Messages")
+    )
+    return sources, intents, counts
+
+def total_by(counts, col):
+    """Collapse the pre-aggregated counts to one column, largest first (like value_counts)."""
+    return counts.groupby(col, observed=True)["Messages"].sum().sort_values(ascending=False).reset_index()
+
+@st.cache_data(show_spinner=False)
+def load_summaries(path, mtime):
+    """Read the session summaries JSONL; `mtime` only keys the cache."""
+    summaries = []
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                summaries.append(orjson.loads(line))
+            except:
+                continue
+    return summaries
+
+SMALL_COLLECTION = 20
+
+def render_collection(items, key_label="key", value_label="price"):
+    """Show a dict/list from the admin JSON files; small ones skip the DataFrame + interactive grid."""
+    if isinstance(items, dict):
+        if len(items) <= SMALL_COLLECTION:
+            st.json(items)
+        else:
+            st.dataframe(pd.DataFrame(list(items.items()), columns=[key_label, value_label]), use_container_width=True)
+    elif isinstance(items, list):
+        if len(items) <= SMALL_COLLECTION:
+            st.table(items)
+        else:
+            st.dataframe(pd.DataFrame(items), use_container_width=True)
+    else:
+        st.info("Empty category")
 
 def ensure_csv(path, cols):
+    """Create `path` with just a header row if it does not exist yet."""
     if not os.path.exists(path):
         pd.DataFrame(columns=cols).to_csv(path, index=False)
-    return pd.read_csv(path)
+
+@st.cache_data(show_spinner=False)
+def load_csv(path, mtime, usecols=None):
+    """Read a text-only CSV for display; `mtime` only keys the cache.
+
+    Columns are read straight into Arrow-backed strings (no dtype inference), which is also the
+    format st.dataframe ships to the browser.
+    """
+    return pd.read_csv(path, engine="c", usecols=usecols, dtype="string[pyarrow]")
+
+def append_csv_row(path, row):
+    """Append one row to an existing CSV without re-reading or rewriting the file."""
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerow(row)
 
 # --- Data Sources ---
 QA_CSV = "data\\qa_pairs.csv"
@@ -57,42 +153,29 @@ with tabs[0]:
         st.warning("No logs found yet.")
         st.stop()
 
-    # --- Parse logs ---
-    log_lines = []
-    with open(LOG_FILE, "r", encoding="ISO-8859-1") as f:
-        for line in f:
-            parts = [part.strip() for part in line.strip().split("|")]
-            if len(parts) >= 8:
-                timestamp = parts[0]
-                source = parts[3]
-                session_id = parts[4]
-                user_input = parts[5]
-                response = parts[6]
-                guest_type = parts[7]
-                intent_match = re.search(r"Intent: (.+)", line)
-                intent = intent_match.group(1) if intent_match else "Unknown"
-                log_lines.append([timestamp, source, session_id, user_input, response, intent, guest_type])
-
-    df = pd.DataFrame(
-        log_lines,
-        columns=["Timestamp", "Source", "Session ID", "User Input", "Response", "Intent", "Guest Type"],
-    )
-    df["Timestamp"] = pd.to_datetime(df["Timestamp"], errors="coerce")
-    df["Date"] = df["Timestamp"].dt.date
+    # --- Parse logs (cached until bot.log changes) ---
+    log_mtime = os.path.getmtime(LOG_FILE)
+    df = load_logs(LOG_FILE, log_mtime)
+    sources, intents, counts = log_aggregates(LOG_FILE, log_mtime)
 
     # --- Sidebar filters ---
     st.sidebar.header("🔍 Filter Analytics")
-    source_filter = st.sidebar.selectbox("📱 Channel", ["All"] + sorted(df["Source"].unique().tolist()))
-    intent_filter = st.sidebar.selectbox("🎯 Intent", ["All"] + sorted(df["Intent"].unique().tolist()))
+    source_filter = st.sidebar.selectbox("📱 Channel", ["All"] + sources)
+    intent_filter = st.sidebar.selectbox("🎯 Intent", ["All"] + intents)
     guest_filter = st.sidebar.selectbox("🏷️ Guest Type", ["All", "Guest", "Non-Guest"])
 
-    filtered_df = df.copy()
-    if source_filter != "All":
-        filtered_df = filtered_df[filtered_df["Source"] == source_filter]
-    if intent_filter != "All":
-        filtered_df = filtered_df[filtered_df["Intent"] == intent_filter]
-    if guest_filter != "All":
-        filtered_df = filtered_df[filtered_df["Guest Type"].str.lower() == guest_filter.lower()]
+    def apply_filters(frame):
+        if source_filter != "All":
+            frame = frame[frame["Source"] == source_filter]
+        if intent_filter != "All":
+            frame = frame[frame["Intent"] == intent_filter]
+        if guest_filter != "All":
+            frame = frame[frame["Guest Type"].str.lower() == guest_filter.lower()]
+        return frame
+
+    # Raw rows for the session/log views; the small aggregate for the charts
+    filtered_df = apply_filters(df)
+    filtered_counts = apply_filters(counts)
 
     # KPIs
     col1, col2, col3, col4 = st.columns(4)
@@ -103,30 +186,30 @@ with tabs[0]:
 
     st.markdown("---")
 
-    # Graphs
-    st.subheader("Guest vs Non-Guest Breakdown")
-    guest_counts = df["Guest Type"].value_counts().reset_index()
+    # Graphs (2-column grid; data comes from the cached aggregate)
+    guest_counts = total_by(counts, "Guest Type")
     guest_counts.columns = ["Guest Type", "Messages"]
-    st.plotly_chart(px.pie(guest_counts, names="Guest Type", values="Messages"), use_container_width=True)
-
-    st.subheader("Channel Distribution")
-    source_counts = filtered_df["Source"].value_counts().reset_index()
+    source_counts = total_by(filtered_counts, "Source")
     source_counts.columns = ["Channel", "Messages"]
-    st.plotly_chart(px.pie(source_counts, names="Channel", values="Messages"), use_container_width=True)
-
-    st.subheader("Daily Interaction Volume")
-    daily = filtered_df.groupby("Date").size().reset_index(name="Messages")
-    st.plotly_chart(px.line(daily, x="Date", y="Messages", markers=True), use_container_width=True)
-
-    st.subheader("Guest Needs Breakdown")
-    intent_counts = filtered_df["Intent"].value_counts().reset_index()
+    daily = filtered_counts.groupby("Date")["Messages"].sum().reset_index()
+    intent_counts = total_by(filtered_counts, "Intent")
     intent_counts.columns = ["Intent", "Count"]
-    st.plotly_chart(px.bar(intent_counts, x="Intent", y="Count", color="Intent"), use_container_width=True)
-
-    st.subheader("Engagement by Session")
     session_counts = filtered_df["Session ID"].value_counts().reset_index()
     session_counts.columns = ["Session ID", "Messages"]
-    st.plotly_chart(px.bar(session_counts, x="Session ID", y="Messages"), use_container_width=True)
+
+    def show_chart(container, title, fig):
+        # a fixed uirevision lets plotly.js diff the figure across reruns instead of rebuilding it
+        fig.update_layout(uirevision="static")
+        container.subheader(title)
+        container.plotly_chart(fig, use_container_width=True)
+
+    g1, g2 = st.columns(2)
+    show_chart(g1, "Guest vs Non-Guest Breakdown", px.pie(guest_counts, names="Guest Type", values="Messages"))
+    show_chart(g2, "Channel Distribution", px.pie(source_counts, names="Channel", values="Messages"))
+    g3, g4 = st.columns(2)
+    show_chart(g3, "Daily Interaction Volume", px.line(daily, x="Date", y="Messages", markers=True))
+    show_chart(g4, "Guest Needs Breakdown", px.bar(intent_counts, x="Intent", y="Count", color="Intent"))
+    show_chart(st, "Engagement by Session", px.bar(session_counts, x="Session ID", y="Messages"))
 
     st.subheader("📜 Guest Interaction Log")
     st.dataframe(filtered_df)
@@ -135,13 +218,7 @@ with tabs[0]:
 
     st.subheader("🧠 Guest Session Summaries")
     if os.path.exists(SUMMARY_PATH):
-        summaries = []
-        with open(SUMMARY_PATH, "r", encoding="ISO-8859-1") as f:
-            for line in f:
-                try:
-                    summaries.append(json.loads(line.strip()))
-                except:
-                    continue
+        summaries = load_summaries(SUMMARY_PATH, os.path.getmtime(SUMMARY_PATH))
         if summaries:
             summary_df = pd.DataFrame(summaries)
             for _, row in summary_df.iterrows():
@@ -154,18 +231,58 @@ with tabs[0]:
 # ======================================================
 with tabs[1]:
     # dashboard_live.py (updated)
-    import os
-    import time
-    import requests
-    import pandas as pd
-    import streamlit as st
-    from datetime import date, datetime
-
     # --------- CONFIG ---------
     API = os.getenv("AIC_API", "http://localhost:5002")  # FastAPI base
 
     st.title("ILLORA RETREATS – Live Admin Dashboard")
 
+    # --- HTTP ---
+    @st.cache_resource(show_spinner=False)
+    def get_api_client():
+        """One keep-alive connection pool shared by every rerun of this page."""
+        return httpx.Client(timeout=20, limits=httpx.Limits(max_keepalive_connections=16))
+
+    @st.cache_resource(show_spinner=False)
+    def get_fetch_pool():
+        return ThreadPoolExecutor(max_workers=4, thread_name_prefix="dashboard-fetch")
+
+    def get_concurrently(urls):
+        """Fire GETs for all `urls` at once; returns futures in the same (preference) order."""
+        client = get_api_client()
+        pool = get_fetch_pool()
+        return [pool.submit(client.get, url) for url in urls]
+
+    @st.cache_resource(show_spinner=False)
+    def get_event_watcher(events_url):
+        """Subscribe once to the backend's SSE stream in a daemon thread and count pushed events.
+
+        Reruns compare the count instead of re-fetching everything on a timer.
+        """
+        state = {"count": 0, "connected": False}
+
+        def run():
+            client = httpx.Client(timeout=httpx.Timeout(20, read=None))
+            while True:
+                try:
+                    with client.stream("GET", events_url) as r:
+                        state["connected"] = r.status_code == 200
+                        for line in r.iter_lines():
+                            if not line.startswith("data:"):
+                                continue
+                            try:
+                                event = orjson.loads(line[5:]).get("event")
+                            except (orjson.JSONDecodeError, AttributeError):
+                                event = None
+                            if event != "connected":
+                                state["count"] += 1
+                except httpx.HTTPError:
+                    pass
+                state["connected"] = False
+                time.sleep(5)
+
+        threading.Thread(target=run, daemon=True, name="dashboard-sse").start()
+        return state
+
     # --- Utility ---
     def to_df(bookings_json):
         """Accepts either {'bookings': [...]} or a raw list and returns a DataFrame with parsed dates."""
@@ -201,13 +318,13 @@ with tabs[1]:
             f"{API}/demo/bookings/all",
         ]
         last_exc = None
-        for url in endpoints:
+        for url, fut in zip(endpoints, get_concurrently(endpoints)):
             try:
-                r = requests.get(url, timeout=20)
+                r = fut.result()
                 # Accept 200; if 404/405 try next
                 if r.status_code == 200:
                     try:
-                        data = r.json()
+                        data = orjson.loads(r.content)
                     except ValueError:
                         # non-json
                         continue
@@ -217,7 +334,7 @@ with tabs[1]:
                     # record last error and try next endpoint
                     last_exc = Exception(f"{url} -> {r.status_code} {r.text}")
                     continue
-            except requests.RequestException as e:
+            except httpx.HTTPError as e:
                 last_exc = e
                 continue
 
@@ -235,13 +352,13 @@ with tabs[1]:
             f"{API}/chat/messages?limit={limit}",
             f"{API}/chats/messages?limit={limit}",
         ]
-        for url in endpoints:
+        for fut in get_concurrently(endpoints):
             try:
-                r = requests.get(url, timeout=20)
+                r = fut.result()
                 if r.status_code != 200:
                     continue
                 try:
-                    payload = r.json()
+                    payload = orjson.loads(r.content)
                 except ValueError:
                     continue
 
@@ -258,7 +375,7 @@ with tabs[1]:
                 if "created_at" in df.columns:
                     df["created_at"] = pd.to_datetime(df["created_at"], errors="coerce")
                 return df
-            except requests.RequestException:
+            except httpx.HTTPError:
                 continue
 
         # No chat endpoint exposed; return empty DF with expected columns
@@ -266,51 +383,44 @@ with tabs[1]:
 
     def patch_booking(booking_id, payload):
         """
-        Try DB update endpoint first (/bookings/{id}/update) then fallback to demo (/demo/bookings/{id}).
+        Update a booking via the DB endpoint (/bookings/{id}/update) or the demo one (/demo/bookings/{id}).
+        The backend that succeeded last time is remembered in st.session_state['patch_base'] and tried
+        first, so demo-only deployments don't pay a 404 round trip on every edit.
         Returns the response JSON on success or raises an exception.
         """
-        # Try DB update route used in main.py
-        db_update_url = f"{API}/bookings/{booking_id}/update"
-        demo_update_url = None
-        try:
-            # attempt DB update
-            r = requests.patch(db_update_url, json=payload, timeout=20)
-            if r.status_code in (200, 201):
-                return r.json()
-            # if 404, try demo update below
-            if r.status_code == 404:
-                # fall through to demo fallback
-                pass
-            else:
-                r.raise_for_status()
-        except requests.HTTPError as he:
-            # if server returned 404 or other error, we'll try demo fallback
-            if r is not None and r.status_code == 404:
-                pass
-            else:
-                raise
-        except requests.RequestException:
-            # network error or other; try demo fallback
-            pass
-
-        # fallback: if booking_id is numeric, try demo in-memory update
         try:
             int_id = int(booking_id)
         except Exception:
             int_id = None
 
+        urls = {"db": f"{API}/bookings/{booking_id}/update"}
         if int_id is not None:
-            demo_update_url = f"{API}/demo/bookings/{int_id}"
+            urls["demo"] = f"{API}/demo/bookings/{int_id}"
+
+        first = st.session_state.get("patch_base", "db")
+        order = [first] + [b for b in ("db", "demo") if b != first]
+        last_error = None
+        for base in order:
+            url = urls.get(base)
+            if url is None:
+                continue
             try:
-                r2 = requests.patch(demo_update_url, json=payload, timeout=20)
-                r2.raise_for_status()
-                return r2.json()
-            except requests.RequestException as e:
-                # bubble up a helpful error
-                raise Exception(f"Both DB and demo update failed: DB-> {db_update_url}, Demo-> {demo_update_url}. Last error: {e}")
+                r = get_api_client().patch(url, json=payload)
+            except httpx.HTTPError as e:
+                # network error; try the other backend
+                last_error = e
+                continue
+            if r.is_success:
+                st.session_state["patch_base"] = base
+                return orjson.loads(r.content)
+            if r.status_code != 404 and base == "db":
+                # the DB backend exists but rejected the update: surface that instead of masking it
+                r.raise_for_status()
+            last_error = f"HTTP {r.status_code} from {url}"
 
-        # if booking_id not numeric or demo fallback unavailable, raise
-        raise Exception(f"Failed to update booking {booking_id}. Tried {db_update_url} and no demo fallback available.")
+        if "demo" not in urls:
+            raise Exception(f"Failed to update booking {booking_id}. Tried {urls['db']} and no demo fallback available.")
+        raise Exception(f"Both DB and demo update failed: DB-> {urls['db']}, Demo-> {urls['demo']}. Last error: {last_error}")
 
     # --- Controls row ---
     colL, colM, colR = st.columns([1, 1, 2])
@@ -318,9 +428,9 @@ with tabs[1]:
         if st.button("Seed 20 Sample Bookings"):
             try:
                 # main.py exposes POST /admin/seed with query param "count"
-                r = requests.post(f"{API}/admin/seed?count=20", timeout=60)
+                r = get_api_client().post(f"{API}/admin/seed?count=20", timeout=60)
                 if r.status_code == 200:
-                    st.success(r.json())
+                    st.success(orjson.loads(r.content))
                     # refresh after seeding
                     time.sleep(0.3)
                     st.experimental_rerun()
@@ -331,22 +441,30 @@ with tabs[1]:
     with colM:
         refresh_sec = st.number_input("Auto-refresh (seconds)", min_value=3, max_value=60, value=5, step=1)
     with colR:
-        st.caption("Tip: This dashboard auto-refreshes. Your React frontend can subscribe to `/events` for push updates.")
-
-    # --- Auto refresh ---
-    try:
-        st.cache_data.clear()
-        st.cache_resource.clear()
-    except Exception:
-        # older streamlit may not have these APIs
-        pass
+        st.caption("Tip: This dashboard reloads when the backend pushes an event on `/events`; it falls back to timed refresh if the stream is down.")
 
+    # --- Auto refresh (event-driven) ---
+    watcher = get_event_watcher(f"{API}/events")
     if "last_refresh" not in st.session_state:
         st.session_state["last_refresh"] = time.time()
+    if "last_event" not in st.session_state:
+        st.session_state["last_event"] = watcher["count"]
 
-    if time.time() - st.session_state["last_refresh"] > refresh_sec:
-        st.session_state["last_refresh"] = time.time()
-        st.rerun()
+    def rerun_if_changed():
+        # Only a local counter check; bookings are re-fetched only when something happened
+        if watcher["connected"]:
+            changed = watcher["count"] != st.session_state["last_event"]
+        else:
+            changed = time.time() - st.session_state["last_refresh"] > refresh_sec
+        if changed:
+            st.session_state["last_event"] = watcher["count"]
+            st.session_state["last_refresh"] = time.time()
+            st.rerun()
+
+    if hasattr(st, "fragment"):
+        st.fragment(run_every=refresh_sec)(rerun_if_changed)()
+    else:
+        rerun_if_changed()
 
     # --- Data fetch ---
     try:
@@ -453,15 +571,15 @@ with tabs[1]:
 # ======================================================
 with tabs[2]:
     st.header("💬 Q&A Manager")
-    qa_df = ensure_csv('data\\qa_pairs.csv', ["question", "answer"])
+    ensure_csv(QA_CSV, ["question", "answer"])
+    qa_df = load_csv(QA_CSV, os.path.getmtime(QA_CSV), usecols=["question", "answer"])
     st.dataframe(qa_df, use_container_width=True)
 
     with st.form("addqa", clear_on_submit=True):
         q = st.text_input("Question")
         a = st.text_area("Answer")
         if st.form_submit_button("➕ Add Q&A"):
-            qa_df = qa_df.append({"question": q, "answer": a}, ignore_index=True)
-            qa_df.to_csv(QA_CSV, index=False)
+            append_csv_row(QA_CSV, [q, a])
             st.success("Q&A added!")
 
 # ======================================================
@@ -470,27 +588,21 @@ with tabs[2]:
 with tabs[3]:
     st.header("🏷️ Menu Manager")
     default_menu = {"add_ons": {}, "rooms": {}, "complimentary": {}}
-    menu = load_json(MENU_FILE, default_menu)
+    menu = load_json_cached(MENU_FILE, default_menu)
 
     for cat, items in menu.items():
         with st.expander(f"{cat.title()}"):
-            if isinstance(items, dict):
-                df_items = pd.DataFrame([{"key": k, "price": v} for k, v in items.items()])
-                st.dataframe(df_items)
-            elif isinstance(items, list):
-                st.dataframe(pd.DataFrame(items))
-            else:
-                st.info("Empty category")
+            render_collection(items)
 
 # ======================================================
 # 📢 CAMPAIGNS MANAGER TAB
 # ======================================================
 with tabs[4]:
     st.header("📢 Campaigns Manager")
-    campaigns = load_json(CAMPAIGNS_FILE, [])
+    campaigns = load_json_cached(CAMPAIGNS_FILE, [])
 
     if campaigns:
-        st.dataframe(pd.DataFrame(campaigns), use_container_width=True)
+        render_collection(campaigns)
     else:
         st.info("No campaigns yet.")
 
@@ -530,10 +642,10 @@ with tabs[5]:
 
     DOSDONTS_FILE = 'data\\dos_donts.json'    
     # Load existing instructions
-    dos_donts = load_json(DOSDONTS_FILE, [])
+    dos_donts = load_json_cached(DOSDONTS_FILE, [])
 
     if dos_donts:
-        st.dataframe(pd.DataFrame(dos_donts), use_container_width=True)
+        render_collection(dos_donts)
     else:
         st.info("No instructions added yet.")
 
@@ -563,11 +675,11 @@ with tabs[6]:
     agents_file = 'data\\agents.json'
 
     # Load existing agents
-    try:
-        with open(agents_file, 'r') as f_new:
-            agents = json.load(f_new)
-    except (FileNotFoundError, json.JSONDecodeError):
-        agents = []
+    agents = load_json_cached(agents_file, [])
+    # First entry per room wins, matching the old linear scan; values are the same dicts as in `agents`
+    agents_by_room = {}
+    for agent in agents:
+        agents_by_room.setdefault(agent.get("agent_allocation"), agent)
 
     st.json(agents)
 
@@ -589,20 +701,17 @@ with tabs[6]:
                 }
 
                 # ✅ Check if room already exists
-                updated = False
-                for agent in agents:
-                    if agent["agent_allocation"] == room_number_text.strip():
-                        agent["agent_name"] = agent_name_text.strip()
-                        updated = True
-                        break
+                existing = agents_by_room.get(room_number_text.strip())
+                updated = existing is not None
+                if updated:
+                    existing["agent_name"] = agent_name_text.strip()
 
                 # ✅ If not found, append new entry
                 if not updated:
                     agents.append(new_entry)
 
                 # ✅ Save back to JSON
-                with open(agents_file, 'w') as f:
-                    json.dump(agents, f, indent=4)
+                save_json(agents_file, agents)
 
                 if updated:
                     st.success(f"Updated agent for room {room_number_text.strip()} ✅")
@@ -1,10 +1,15 @@
 # dashboard_live.py (updated)
 import os
 import time
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import numpy as np
 import pandas as pd
 import streamlit as st
 from datetime import date, datetime
+from concurrent.futures import ThreadPoolExecutor
 
 # --------- CONFIG ---------
 API = os.getenv("AIC_API", "http://localhost:5002")  # FastAPI base
@@ -12,6 +17,34 @@ st.set_page_config(page_title="AI Chieftain – Live Admin", layout="wide")
 
 st.title("ILLORA RETREATS – Live Admin Dashboard")
 
+@st.cache_resource(show_spinner=False)
+def get_session():
+    """Keep-alive HTTP session shared by every rerun (Streamlit re-executes this script each time)."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=Retry(total=2, backoff_factor=0.1))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Accept-Encoding"] = "gzip"
+    return session
+
+SESSION = get_session()
+
+# Candidate endpoints are probed at once, so each probe gets a short timeout
+PROBE_TIMEOUT = 5
+
+@st.cache_resource(show_spinner=False)
+def get_probe_pool():
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix="dashboard-probe")
+
+def probe(urls):
+    """Fire GETs for all `urls` concurrently; returns futures in the same (preference) order."""
+    pool = get_probe_pool()
+    return [pool.submit(SESSION.get, url, timeout=PROBE_TIMEOUT) for url in urls]
+
+# Backend responses are reused for at most the shortest auto-refresh interval (the refresh
+# input's minimum), so no refresh setting ever shows data older than one tick
+FETCH_TTL = 3
+
 # --- Utility ---
 def to_df(bookings_json):
     """Accepts either {'bookings': [...]} or a raw list and returns a DataFrame with parsed dates."""
@@ -31,6 +64,7 @@ def to_df(bookings_json):
             df[col] = pd.to_datetime(df[col], errors="coerce").dt.date
     return df
 
+@st.cache_data(ttl=FETCH_TTL, show_spinner=False)
 def fetch_bookings():
     """
     Try multiple endpoints (DB-backed then demo) and return a DataFrame.
@@ -47,13 +81,15 @@ def fetch_bookings():
         f"{API}/demo/bookings/all",
     ]
     last_exc = None
-    for url in endpoints:
+    # Walk the probes in preference order: a DB answer wins over demo data even if slower,
+    # but a missing endpoint no longer costs a full round trip before the next is tried
+    for url, fut in zip(endpoints, probe(endpoints)):
         try:
-            r = requests.get(url, timeout=20)
+            r = fut.result()
             # Accept 200; if 404/405 try next
             if r.status_code == 200:
                 try:
-                    data = r.json()
+                    data = orjson.loads(r.content)
                 except ValueError:
                     # non-json
                     continue
@@ -70,6 +106,7 @@ def fetch_bookings():
     # if none succeeded, raise to caller
     raise last_exc or Exception("No bookings endpoint available")
 
+@st.cache_data(ttl=FETCH_TTL, show_spinner=False)
 def fetch_chats(limit=200):
     """
     Attempt to fetch recent chats from multiple possible endpoints.
@@ -81,13 +118,13 @@ def fetch_chats(limit=200):
         f"{API}/chat/messages?limit={limit}",
         f"{API}/chats/messages?limit={limit}",
     ]
-    for url in endpoints:
+    for fut in probe(endpoints):
         try:
-            r = requests.get(url, timeout=20)
+            r = fut.result()
             if r.status_code != 200:
                 continue
             try:
-                payload = r.json()
+                payload = orjson.loads(r.content)
             except ValueError:
                 continue
 
@@ -112,51 +149,59 @@ def fetch_chats(limit=200):
 
 def patch_booking(booking_id, payload):
     """
-    Try DB update endpoint first (/bookings/{id}/update) then fallback to demo (/demo/bookings/{id}).
+    Update a booking via the DB endpoint (/bookings/{id}/update) or the demo one (/demo/bookings/{id}).
+    The backend that succeeded last time is remembered in st.session_state['patch_base'] and tried
+    first, so demo-only deployments don't pay a 404 round trip on every edit.
     Returns the response JSON on success or raises an exception.
     """
-    # Try DB update route used in main.py
-    db_update_url = f"{API}/bookings/{booking_id}/update"
-    demo_update_url = None
-    try:
-        # attempt DB update
-        r = requests.patch(db_update_url, json=payload, timeout=20)
-        if r.status_code in (200, 201):
-            return r.json()
-        # if 404, try demo update below
-        if r.status_code == 404:
-            # fall through to demo fallback
-            pass
-        else:
-            r.raise_for_status()
-    except requests.HTTPError as he:
-        # if server returned 404 or other error, we'll try demo fallback
-        if r is not None and r.status_code == 404:
-            pass
-        else:
-            raise
-    except requests.RequestException:
-        # network error or other; try demo fallback
-        pass
-
-    # fallback: if booking_id is numeric, try demo in-memory update
     try:
         int_id = int(booking_id)
     except Exception:
         int_id = None
 
+    urls = {"db": f"{API}/bookings/{booking_id}/update"}
     if int_id is not None:
-        demo_update_url = f"{API}/demo/bookings/{int_id}"
+        urls["demo"] = f"{API}/demo/bookings/{int_id}"
+
+    first = st.session_state.get("patch_base", "db")
+    order = [first] + [b for b in ("db", "demo") if b != first]
+    last_error = None
+    for base in order:
+        url = urls.get(base)
+        if url is None:
+            continue
         try:
-            r2 = requests.patch(demo_update_url, json=payload, timeout=20)
-            r2.raise_for_status()
-            return r2.json()
+            r = SESSION.patch(url, json=payload, timeout=20)
         except requests.RequestException as e:
-            # bubble up a helpful error
-            raise Exception(f"Both DB and demo update failed: DB-> {db_update_url}, Demo-> {demo_update_url}. Last error: {e}")
+            # network error; try the other backend
+            last_error = e
+            continue
+        if r.ok:
+            st.session_state["patch_base"] = base
+            return orjson.loads(r.content)
+        if r.status_code != 404 and base == "db":
+            # the DB backend exists but rejected the update: surface that instead of masking it
+            r.raise_for_status()
+        last_error = f"HTTP {r.status_code} from {url}"
+
+    if "demo" not in urls:
+        raise Exception(f"Failed to update booking {booking_id}. Tried {urls['db']} and no demo fallback available.")
+    raise Exception(f"Both DB and demo update failed: DB-> {urls['db']}, Demo-> {urls['demo']}. Last error: {last_error}")
 
-    # if booking_id not numeric or demo fallback unavailable, raise
-    raise Exception(f"Failed to update booking {booking_id}. Tried {db_update_url} and no demo fallback available.")
+def compute_kpis(df, today):
+    """(total, revenue, today's check-ins, occupancy %) for the bookings frame."""
+    total = len(df)
+    price_col = "price" if "price" in df.columns else "amount" if "amount" in df.columns else None
+    revenue = 0.0
+    if price_col:
+        revenue = float(np.nansum(pd.to_numeric(df[price_col], errors="coerce").to_numpy(dtype="float64")))
+    todays_checkins = int((df["check_in"].to_numpy() == today).sum()) if "check_in" in df.columns else 0
+    occ = 0
+    if "status" in df.columns and total > 0:
+        # handle both "status" strings and enums that may be present
+        status = np.char.upper(df["status"].astype(str).to_numpy(dtype=str))
+        occ = int(np.isin(status, ("CHECKED_IN", "CONFIRMED")).mean() * 100)
+    return total, revenue, todays_checkins, occ
 
 # --- Controls row ---
 colL, colM, colR = st.columns([1, 1, 2])
@@ -164,9 +209,10 @@ with colL:
     if st.button("Seed 20 Sample Bookings"):
         try:
             # main.py exposes POST /admin/seed with query param "count"
-            r = requests.post(f"{API}/admin/seed?count=20", timeout=60)
+            r = SESSION.post(f"{API}/admin/seed?count=20", timeout=60)
             if r.status_code == 200:
-                st.success(r.json())
+                st.success(orjson.loads(r.content))
+                fetch_bookings.clear()
                 # refresh after seeding
                 time.sleep(0.3)
                 st.experimental_rerun()
@@ -175,70 +221,52 @@ with colL:
         except Exception as e:
             st.error(str(e))
 with colM:
-    refresh_sec = st.number_input("Auto-refresh (seconds)", min_value=3, max_value=60, value=5, step=1)
+    refresh_sec = st.number_input("Auto-refresh (seconds)", min_value=3, max_value=60, value=5, step=1, key="refresh_sec")
 with colR:
     st.caption("Tip: This dashboard auto-refreshes. Your React frontend can subscribe to `/events` for push updates.")
 
-# --- Auto refresh ---
-try:
-    st.cache_data.clear()
-    st.cache_resource.clear()
-except Exception:
-    # older streamlit may not have these APIs
-    pass
-
-if "last_refresh" not in st.session_state:
-    st.session_state["last_refresh"] = time.time()
-
-if time.time() - st.session_state["last_refresh"] > refresh_sec:
-    st.session_state["last_refresh"] = time.time()
-    st.rerun()
-
 # --- Data fetch ---
-try:
-    df = fetch_bookings()
-except Exception as e:
-    st.error(f"Failed to load bookings: {e}")
-    df = pd.DataFrame()
-
-# --- KPIs ---
-with st.container():
-    c1, c2, c3, c4 = st.columns(4)
-    total = len(df)
+def load_bookings():
+    """Bookings frame plus the fetch error, if any (cheap on reruns thanks to the fetch cache)."""
+    try:
+        return fetch_bookings(), None
+    except Exception as e:
+        return pd.DataFrame(), e
 
-    revenue = 0.0
-    if "price" in df.columns:
-        revenue = float(df["price"].fillna(0).sum())
-    elif "amount" in df.columns:
-        revenue = float(df["amount"].fillna(0).sum())
+# --- Live panel: KPIs + bookings table ---
+def live_panel():
+    df, err = load_bookings()
+    if err is not None:
+        st.error(f"Failed to load bookings: {err}")
 
-    today = date.today()
-    todays_checkins = 0
-    if "check_in" in df.columns:
-        todays_checkins = int((df["check_in"] == today).sum())
+    # --- KPIs ---
+    with st.container():
+        c1, c2, c3, c4 = st.columns(4)
+        total, revenue, todays_checkins, occ = compute_kpis(df, date.today())
 
-    occ = 0
-    if "status" in df.columns and len(df) > 0:
-        # handle both "status" strings and enums that may be present
-        occ = int((
-            df["status"].astype(str).str.upper().isin(["CHECKED_IN", "CONFIRMED"]).sum()
-            / max(1, len(df))
-        ) * 100)
+        c1.metric("Total Bookings", total)
+        c2.metric("Revenue (quoted)", f"₹ {int(revenue):,}")
+        c3.metric("Today's Check-ins", todays_checkins)
+        c4.metric("Occupancy (rough)", f"{occ}%")
 
-    c1.metric("Total Bookings", total)
-    c2.metric("Revenue (quoted)", f"₹ {int(revenue):,}")
-    c3.metric("Today's Check-ins", todays_checkins)
-    c4.metric("Occupancy (rough)", f"{occ}%")
+    st.markdown("---")
 
-st.markdown("---")
+    st.subheader("Bookings")
+    if df.empty:
+        st.info("No bookings yet.")
+    else:
+        st.dataframe(df, use_container_width=True, hide_index=True)
 
-# --- Bookings table + quick editor ---
-st.subheader("Bookings")
-if df.empty:
-    st.info("No bookings yet.")
+# --- Auto refresh ---
+# Only the live panel re-runs on the timer; the edit form and chat filters below are left alone
+if hasattr(st, "fragment"):
+    st.fragment(run_every=refresh_sec)(live_panel)()
 else:
-    st.dataframe(df, use_container_width=True, hide_index=True)
+    live_panel()
 
+# --- Quick editor ---
+df, _ = load_bookings()
+if not df.empty:
     st.markdown("### Edit a booking")
     with st.form("edit_booking"):
         bid = st.text_input("Booking ID")
@@ -260,6 +288,7 @@ else:
                 payload["guest"] = new_guest_name
             try:
                 resp = patch_booking(bid, payload)
+                fetch_bookings.clear()
                 st.success(f"Updated: {resp}")
                 st.experimental_rerun()
             except Exception as e:
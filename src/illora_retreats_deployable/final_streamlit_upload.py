@@ -1,8 +1,11 @@
 import streamlit as st
 import os
+import csv
 import json
+import shutil
 import pandas as pd
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 # === Replace with your actual import paths ===
 from helper.qa_generator import generate_qa_pairs  # used for manual form
@@ -25,6 +28,51 @@ mode = st.selectbox("Choose how you want to generate Q&A pairs:", ["📋 Fill Ho
 # Shared output file
 OUTPUT_FILENAME = "qa_pairs.csv"
 
+# Per-file pipeline runs are dominated by the two LLM round trips, so files are processed in parallel
+MAX_PIPELINE_WORKERS = 8
+
+
+def process_one(uploaded, hotel_context):
+    """Save, extract, summarize and generate Q&A for one uploaded file.
+
+    Runs in a worker thread, so it must not call st.*; the caller renders the returned dict.
+    `error` is set (and later fields left as None) at the first step that fails.
+    """
+    result = {"name": uploaded.name, "extracted": False, "summary": None,
+              "raw_response": None, "parsed_pairs": None, "error": None}
+    temp_path = Path(UPLOAD_TEMP_DIR) / uploaded.name
+
+    try:
+        # stream in 1 MiB chunks instead of materialising the whole upload a second time
+        uploaded.seek(0)
+        with open(temp_path, "wb") as f:
+            shutil.copyfileobj(uploaded, f, length=1 << 20)
+    except Exception as e:
+        result["error"] = f"Failed to save {uploaded.name}: {e}"
+        return result
+
+    # Extract text
+    try:
+        text = extract_document(str(temp_path))
+        result["extracted"] = True
+    except Exception as e:
+        result["error"] = f"Extraction failed: {e}"
+        return result
+
+    # Summarize
+    try:
+        result["summary"], _ = summarize_text(uploaded.name, text)
+    except Exception as e:
+        result["error"] = f"Summarization failed: {e}"
+        return result
+
+    # Generate Q&A pairs
+    try:
+        result["raw_response"], result["parsed_pairs"] = generate_qa_pairs_from_summary(hotel_context, result["summary"], QA_PAIR_COUNT)
+    except Exception as e:
+        result["error"] = f"Q&A generation failed: {e}"
+    return result
+
 # ------------------------- #
 # 📋 FORM-BASED Q&A LOGIC
 # ------------------------- #
@@ -57,12 +105,16 @@ if mode == "📋 Fill Hotel Form":
             try:
                 qa_pairs = generate_qa_pairs(hotel_info)
 
-                with open(OUTPUT_FILENAME, "w", encoding="utf-8") as f:
-                    for line in qa_pairs:
-                        f.write(line.strip() + "\n")
+                # Split each "<question>,<answer>" line once and let csv.writer quote as needed
+                with open(OUTPUT_FILENAME, "w", newline="", encoding="utf-8") as f:
+                    writer = csv.writer(f, quoting=csv.QUOTE_MINIMAL)
+                    writer.writerows(
+                        parts for parts in (line.strip().split(",", 1) for line in qa_pairs) if len(parts) == 2
+                    )
 
                 st.success(f"✅ Q&A dataset saved as `{OUTPUT_FILENAME}`")
-                st.download_button("📥 Download Q&A CSV", data="\n".join(qa_pairs), file_name=OUTPUT_FILENAME)
+                with open(OUTPUT_FILENAME, "rb") as f:
+                    st.download_button("📥 Download Q&A CSV", data=f.read(), file_name=OUTPUT_FILENAME, mime="text/csv")
 
             except Exception as e:
                 st.error(f"❌ Error: {e}")
@@ -99,63 +151,38 @@ elif mode == "📄 Upload Hotel Documents":
         all_pairs = []
 
         with st.spinner("Processing documents..."):
-            for uploaded in uploaded_files:
-                st.markdown(f"## 📄 Processing: **{uploaded.name}**")
-                temp_path = Path(UPLOAD_TEMP_DIR) / uploaded.name
-
-                try:
-                    with open(temp_path, "wb") as f:
-                        f.write(uploaded.getbuffer())
-                except Exception as e:
-                    st.error(f"Failed to save {uploaded.name}: {e}")
-                    failed.append(uploaded.name)
-                    continue
-
-                # Extract text
-                try:
-                    text = extract_document(str(temp_path))
-                    st.success(f"Extracted text from {uploaded.name}")
-                except Exception as e:
-                    st.error(f"Extraction failed: {e}")
-                    failed.append(uploaded.name)
-                    continue
-
-                # Summarize
-                try:
-                    summary, _ = summarize_text(uploaded.name, text)
-                    st.text_area(f"Summary for {uploaded.name}", value=summary, height=150)
-                except Exception as e:
-                    st.error(f"Summarization failed: {e}")
-                    failed.append(uploaded.name)
-                    continue
-
-                # Generate Q&A pairs
-                try:
-                    raw_response, parsed_pairs = generate_qa_pairs_from_summary(hotel_context, summary, QA_PAIR_COUNT)
-                except Exception as e:
-                    st.error(f"Q&A generation failed: {e}")
-                    failed.append(uploaded.name)
-                    continue
-
-                # Show raw & preview
-                st.text_area(f"Raw QA Output for {uploaded.name}", value=raw_response, height=200)
-                if parsed_pairs:
-                    st.dataframe(pd.DataFrame(parsed_pairs, columns=["question", "answer"]).head(10))
-                else:
-                    st.warning("No Q&A pairs parsed.")
-                    continue
-
-                # Save/append to output file
-                if os.path.exists(OUTPUT_FILENAME):
-                    existing_df = pd.read_csv(OUTPUT_FILENAME, header=None, names=["question", "answer"])
+            workers = min(MAX_PIPELINE_WORKERS, len(uploaded_files))
+            with ThreadPoolExecutor(max_workers=workers) as ex:
+                # map() yields in upload order, so output reads the same as the serial version
+                results = ex.map(lambda uploaded: process_one(uploaded, hotel_context), uploaded_files)
+
+                for res in results:
+                    name = res["name"]
+                    st.markdown(f"## 📄 Processing: **{name}**")
+                    if res["extracted"]:
+                        st.success(f"Extracted text from {name}")
+                    if res["summary"] is not None:
+                        st.text_area(f"Summary for {name}", value=res["summary"], height=150)
+                    if res["error"]:
+                        st.error(res["error"])
+                        failed.append(name)
+                        continue
+
+                    parsed_pairs = res["parsed_pairs"]
+
+                    # Show raw & preview
+                    st.text_area(f"Raw QA Output for {name}", value=res["raw_response"], height=200)
+                    if parsed_pairs:
+                        st.dataframe(pd.DataFrame(parsed_pairs, columns=["question", "answer"]).head(10))
+                    else:
+                        st.warning("No Q&A pairs parsed.")
+                        continue
+
+                    # Append to output file (headerless question,answer rows); no re-read or rewrite
                     new_df = pd.DataFrame(parsed_pairs, columns=["question", "answer"])
-                    final_df = pd.concat([existing_df, new_df], ignore_index=True)
-                else:
-                    final_df = pd.DataFrame(parsed_pairs, columns=["question", "answer"])
-
-                final_df.to_csv(OUTPUT_FILENAME, index=False, header=False)
-                st.success(f"Appended {len(parsed_pairs)} Q&A pairs for {uploaded.name}")
-                all_pairs.extend(parsed_pairs)
+                    new_df.to_csv(OUTPUT_FILENAME, mode="a", index=False, header=False)
+                    st.success(f"Appended {len(parsed_pairs)} Q&A pairs for {name}")
+                    all_pairs.extend(parsed_pairs)
 
         if all_pairs:
             st.markdown("### All Q&A Pairs This Session")
@@ -3,17 +3,29 @@ import pdfplumber
 from docx import Document
 from utils_data import clean_text
 
-def extract_from_pdf(path):
-    text = []
+try:
+    import fitz  # PyMuPDF
+    PYMUPDF_AVAILABLE = True
+except Exception:
+    PYMUPDF_AVAILABLE = False
+
+def _pdf_text_pdfplumber(path):
     with pdfplumber.open(path) as pdf:
-        for page in pdf.pages:
-            text.append(page.extract_text() or "")
-    return clean_text("\n".join(text))
+        return "\n".join(page.extract_text() or "" for page in pdf.pages)
+
+def extract_from_pdf(path):
+    # MuPDF's C text extractor is much faster than pdfplumber's pure-Python layout analysis;
+    # pdfplumber stays as the fallback when PyMuPDF is missing or finds no text.
+    text = ""
+    if PYMUPDF_AVAILABLE:
+        with fitz.open(path) as pdf:
+            text = "\n".join(page.get_text() for page in pdf)
+    if not text.strip():
+        text = _pdf_text_pdfplumber(path)
+    return clean_text(text)
 
 def extract_from_docx(path):
-    doc = Document(path)
-    paragraphs = [p.text for p in doc.paragraphs]
-    return clean_text("\n".join(paragraphs))
+    return clean_text("\n".join(p.text for p in Document(path).paragraphs))
 
 def extract_from_txt(path):
     with open(path, encoding="utf-8") as f:
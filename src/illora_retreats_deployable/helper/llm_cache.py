@@ -0,0 +1,40 @@
+import os
+import sqlite3
+import hashlib
+import threading
+import time
+from typing import Optional
+
+# On-disk prompt -> completion cache shared by the Groq helpers, so re-running QA generation or
+# the bot.log summarizer after a crash doesn't pay for the same LLM call twice.
+# Keys cover every parameter that shapes the output (model, temperature, max_tokens, prompt); with
+# temperature > 0 this deliberately pins the first answer for a given key.
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".groq_cache.db")
+
+# One shared connection for the process (autocommit, WAL); access is serialized by _LOCK
+_CONN = sqlite3.connect(LLM_CACHE_PATH, check_same_thread=False, isolation_level=None)
+_CONN.execute("PRAGMA journal_mode=WAL")
+_CONN.execute("PRAGMA synchronous=NORMAL")
+_CONN.execute("""
+CREATE TABLE IF NOT EXISTS llm_cache(
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    created_at REAL NOT NULL
+)""")
+_LOCK = threading.Lock()
+
+def make_key(*parts) -> str:
+    """SHA-256 over the '|'-joined parts."""
+    return hashlib.sha256("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+def cache_get(key: str) -> Optional[str]:
+    with _LOCK:
+        row = _CONN.execute("SELECT value FROM llm_cache WHERE key=?", (key,)).fetchone()
+    return row[0] if row else None
+
+def cache_set(key: str, value: str):
+    with _LOCK:
+        _CONN.execute(
+            "INSERT OR REPLACE INTO llm_cache(key, value, created_at) VALUES(?, ?, ?)",
+            (key, value, time.time()),
+        )
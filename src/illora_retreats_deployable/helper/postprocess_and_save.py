@@ -1,15 +1,24 @@
 import re
+import logging
 import pandas as pd
 from typing import List, Tuple, Union
 
 from config import QA_OUTPUT_CSV
 
+logger = logging.getLogger(__name__)
+
+# leading numbering like "30," "30." "30) "
+_NUM_PREFIX = re.compile(r'^\s*\d+[\)\.\,]?\s*')
+# raw line split after the first "?," (question keeps "?,"), else at the first comma
+_Q_COMMA_SPLIT = re.compile(r'(?s)^(.*?\?,)(.*)$')
+_COMMA_SPLIT = re.compile(r'(?s)^([^,]*),(.*)$')
+
 def sanitize_pair(question: str, answer: str) -> Tuple[str, str]:
     """
     Replace internal commas with semicolons. Preserve the single comma delimiter between
     question and answer. Strip numbering.
     """
-    question = re.sub(r'^\s*\d+[\)\.\,]?\s*', '', question).strip()
+    question = _NUM_PREFIX.sub('', question).strip()
     answer = answer.strip()
 
     question = question.replace(',', ';')
@@ -20,49 +29,38 @@ def sanitize_pair(question: str, answer: str) -> Tuple[str, str]:
 def finalize_and_write(qa_pairs: Union[List[Tuple[str, str]], List[str]]):
     """
     qa_pairs can be a list of (question, answer) tuples or list of raw lines.
-    Normalizes and saves all pairs without deduplication, printing them first.
+    Normalizes and saves all pairs without deduplication.
     """
-    print(qa_pairs)
-    normalized: List[Tuple[str, str]] = []
+    logger.debug("Raw QA pairs: %s", qa_pairs)
 
-    for item in qa_pairs:
-        q_raw = None
-        a_raw = None
+    # One row per input item: tuples fill q/a directly, raw lines go through `line`
+    rows = [
+        (item[0], item[1], None) if isinstance(item, tuple) and len(item) == 2
+        else (None, None, item) if isinstance(item, str)
+        else (None, None, None)
+        for item in qa_pairs
+    ]
+    df = pd.DataFrame(rows, columns=["question", "answer", "line"], dtype=object)
 
-        if isinstance(item, tuple) and len(item) == 2:
-            q_raw, a_raw = item
-        elif isinstance(item, str):
-            line = item.strip()
-            # remove leading numbering like "30," "30." "30) "
-            line = re.sub(r'^\s*\d+[\)\.\,]?\s*', '', line)
-            # try split based on comma after question mark
-            m = re.search(r'\?(,)', line)
-            if m:
-                split_idx = m.end(1)
-                q_raw = line[: m.start(1) + 1].strip()  # includes '?'
-                a_raw = line[split_idx:].strip()
-            else:
-                if ',' in line:
-                    parts = line.split(',', 1)
-                    if len(parts) == 2:
-                        q_raw = parts[0].strip()
-                        a_raw = parts[1].strip()
-        # skip if we didn't get valid raw question/answer
-        if not q_raw or not a_raw:
-            continue
+    lines = df["line"].dropna()
+    if not lines.empty:
+        lines = lines.str.strip().str.replace(_NUM_PREFIX, '', regex=True)
+        by_qmark = lines.str.extract(_Q_COMMA_SPLIT)
+        by_comma = lines.str.extract(_COMMA_SPLIT)
+        parts = by_qmark.fillna(by_comma.where(by_qmark[0].isna()))
+        df.loc[lines.index, "question"] = parts[0].str.strip()
+        df.loc[lines.index, "answer"] = parts[1].str.strip()
 
-        q_san, a_san = sanitize_pair(q_raw, a_raw)
-        if q_san and a_san:
-            normalized.append((q_san, a_san))
+    # skip rows without a raw question/answer, then sanitize (see sanitize_pair)
+    df = df[df["question"].fillna("").astype(bool) & df["answer"].fillna("").astype(bool)]
+    question = df["question"].str.replace(_NUM_PREFIX, '', regex=True).str.strip().str.replace(',', ';', regex=False)
+    answer = df["answer"].str.strip().str.replace(',', ';', regex=False)
+    out = pd.DataFrame({"question": question, "answer": answer})
+    out = out[(out["question"] != "") & (out["answer"] != "")]
 
-    # Print all normalized pairs for debugging
-    print("=== Normalized QA Pairs ===")
-    for q, a in normalized:
-        print(f"{q},{a}")
-    print("=== End Normalized QA Pairs ===")
+    logger.debug("Normalized QA pairs:\n%s", "\n".join(f"{q},{a}" for q, a in out.itertuples(index=False)))
 
     # Save to CSV with no header
-    df = pd.DataFrame(normalized, columns=["question", "answer"])
-    df.to_csv(QA_OUTPUT_CSV, index=False, header=False)
-    print(f"Saved {len(df)} QA pairs to {QA_OUTPUT_CSV}")
-    return len(df)
+    out.to_csv(QA_OUTPUT_CSV, index=False, header=False)
+    print(f"Saved {len(out)} QA pairs to {QA_OUTPUT_CSV}")
+    return len(out)
@@ -1,12 +1,23 @@
-import os
-from dotenv import load_dotenv
+from functools import lru_cache
 from groq import Groq  # Ensure `groq` package is installed
-from config import Config
+from config import Config  # config loads .env
 
-load_dotenv()
+# One Groq client (and HTTP connection pool) per process; stalled calls time out and are retried
+client = Groq(api_key=Config.GROQ_API_KEY, timeout=30.0, max_retries=2)
 
-# Create the Groq client using the API key
-client = Groq(api_key=Config.GROQ_API_KEY)
+
+@lru_cache(maxsize=256)
+def _complete(prompt: str, model: str) -> str:
+    """Completion text for `prompt`; repeated "Generate" clicks with the same form data skip the LLM.
+
+    Sampling is greedy (temperature=0), so the cached text is the answer the model would give anyway.
+    """
+    response = client.chat.completions.create(
+        messages=[{"role": "user", "content": prompt}],
+        model=model,
+        temperature=0,
+    )
+    return response.choices[0].message.content
 
 def generate_qa_pairs(hotel_info: dict) -> list:
     prompt = f"""
@@ -28,9 +39,4 @@ Respond only with the lines.
 
 """
 
-    response = client.chat.completions.create(
-        messages=[{"role": "user", "content": prompt}],
-        model=Config.MODEL_NAME
-    )
-
-    return response.choices[0].message.content.strip().split("\n")
+    return _complete(prompt, Config.MODEL_NAME).strip().split("\n")
@@ -1,9 +1,14 @@
 import os
 import time
+import httpx
 import re
-from typing import List, Tuple
+import pandas as pd
+from typing import Iterator, List, Optional, Tuple
 
 from config_data import LLM_MODEL, QA_PAIR_COUNT
+# same module paths as helper/summarizer.py, so the process has one cache connection and one limiter
+from helper.llm_cache import make_key, cache_get, cache_set
+from helper.rate_limit import groq_limiter, estimate_tokens
 
 # Groq SDK
 try:
@@ -15,56 +20,195 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 if not GROQ_API_KEY:
     raise RuntimeError("GROQ_API_KEY not set in environment variables.")
 
-_client = Groq(api_key=GROQ_API_KEY)
+# One client for the process: every call reuses the same keep-alive HTTP/2 pool instead of
+# a fresh TLS handshake. SDK retries are off because call_llm_model retries itself.
+_http_client = httpx.Client(
+    http2=True,
+    timeout=httpx.Timeout(30.0),
+    limits=httpx.Limits(max_keepalive_connections=32),
+)
+_client = Groq(api_key=GROQ_API_KEY, http_client=_http_client, max_retries=0)
 
-def call_llm_model(model: str, prompt: str, max_tokens: int, temperature: float) -> str:
+# Model per latency tier: short/cheap prompts go to the 8B instant model, heavy ones to the
+# configured LLM_MODEL (70B when unset)
+SPEED_MAP = {
+    "instant": "llama-3.1-8b-instant",
+    "balanced": LLM_MODEL or "llama-3.3-70b-versatile",
+}
+
+def call_llm_model(prompt: str, max_tokens: int, temperature: float, tier: str = "balanced", model: Optional[str] = None) -> str:
     """
     Calls Groq's model and returns generated text with retry.
+    Completions are cached on disk per (model, temperature, max_tokens, prompt).
+    `tier` picks the model from SPEED_MAP; pass `model` only to pin a specific one.
     """
+    model = model or SPEED_MAP.get(tier, LLM_MODEL)
+    key = make_key(model, temperature, max_tokens, prompt)
+    cached = cache_get(key)
+    if cached is not None:
+        return cached
+
     retries = 3
     backoff_base = 1.0
     last_exc = None
     for attempt in range(1, retries + 1):
+        # waits here while the shared RPM/TPM window is full
+        slot = groq_limiter.acquire(estimate_tokens(prompt, max_tokens))
         try:
-            resp = _client.chat.completions.create(
-                model=model or LLM_MODEL,
+            raw = _client.chat.completions.with_raw_response.create(
+                model=model,
                 messages=[
                     {"role": "system", "content": "You are a helpful assistant."},
                     {"role": "user", "content": prompt},
                 ],
                 max_tokens=max_tokens,
                 temperature=temperature,
+                service_tier="auto",
             )
+            groq_limiter.observe_headers(raw.headers)
+            resp = raw.parse()
+            if resp.usage:
+                groq_limiter.settle(slot, resp.usage.total_tokens)
             content = resp.choices[0].message.content
             if isinstance(content, bytes):
                 content = content.decode("utf-8", errors="ignore")
-            return content.strip()
+            content = content.strip()
+            cache_set(key, content)
+            return content
         except Exception as e:
             last_exc = e
-            time.sleep(backoff_base * (2 ** (attempt - 1)))
+            response = getattr(e, "response", None)
+            if getattr(e, "status_code", None) == 429 and response is not None:
+                # the limiter holds the next attempt until the provider's reset
+                groq_limiter.observe_headers(response.headers)
+            else:
+                time.sleep(backoff_base * (2 ** (attempt - 1)))
     raise RuntimeError(f"Failed to call Groq after {retries} attempts. Last error: {last_exc}")
 
+def stream_llm_lines(prompt: str, max_tokens: int, temperature: float, tier: str = "balanced", model: Optional[str] = None) -> Iterator[str]:
+    """
+    Streaming variant of call_llm_model: yields each completed line as tokens arrive.
+    Closing the generator early closes the stream, so the model stops generating.
+    A stream that runs to the end is cached under the same key as call_llm_model.
+    """
+    model = model or SPEED_MAP.get(tier, LLM_MODEL)
+    key = make_key(model, temperature, max_tokens, prompt)
+    cached = cache_get(key)
+    if cached is not None:
+        yield from cached.splitlines()
+        return
+
+    retries = 3
+    backoff_base = 1.0
+    last_exc = None
+    stream = None
+    # retry opening the stream only; once lines have been yielded a retry would repeat them
+    for attempt in range(1, retries + 1):
+        slot = groq_limiter.acquire(estimate_tokens(prompt, max_tokens))
+        try:
+            raw = _client.chat.completions.with_raw_response.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": "You are a helpful assistant."},
+                    {"role": "user", "content": prompt},
+                ],
+                max_tokens=max_tokens,
+                temperature=temperature,
+                service_tier="auto",
+                stream=True,
+            )
+            groq_limiter.observe_headers(raw.headers)
+            stream = raw.parse()
+            break
+        except Exception as e:
+            last_exc = e
+            response = getattr(e, "response", None)
+            if getattr(e, "status_code", None) == 429 and response is not None:
+                groq_limiter.observe_headers(response.headers)
+            else:
+                time.sleep(backoff_base * (2 ** (attempt - 1)))
+    if stream is None:
+        raise RuntimeError(f"Failed to call Groq after {retries} attempts. Last error: {last_exc}")
+
+    parts = []
+    buffer = ""
+    usage = None
+    try:
+        for chunk in stream:
+            # Groq reports usage on the final chunk
+            x_groq = getattr(chunk, "x_groq", None)
+            if x_groq is not None and getattr(x_groq, "usage", None):
+                usage = x_groq.usage
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if not delta:
+                continue
+            parts.append(delta)
+            buffer += delta
+            # keep the trailing partial line in the buffer
+            *lines, buffer = buffer.split("\n")
+            yield from lines
+        if buffer:
+            yield buffer
+        cache_set(key, "".join(parts).strip())
+    finally:
+        # release the unused part of the reservation, also when the caller stopped early
+        used = usage.total_tokens if usage else estimate_tokens(prompt, 0) + len("".join(parts)) // 4
+        groq_limiter.settle(slot, used)
+        stream.close()
+
 # --- Parsing / sanitization logic (same as in postprocess_and_save.py debug harness) ---
 
+# compiled once; these run several times per generated line
+_NUM_PREFIX = re.compile(r'^\s*\d+[\)\.\,]?\s*')
+_TRAILING_SEMI = re.compile(r';+\s*$')
+_QMARK_COMMA = re.compile(r'\?(,)')
+# whole-line splits for the vectorized parser: after the first "?," (question keeps the "?"),
+# else at the first comma
+_Q_COMMA_SPLIT = re.compile(r'(?s)^(.*?\?),(.*)$')
+_COMMA_SPLIT = re.compile(r'(?s)^([^,]*),(.*)$')
+
+# below this many lines the per-line loop beats building pandas Series
+VECTORIZE_MIN_LINES = 200
+
 def sanitize_pair(question: str, answer: str) -> Tuple[str, str]:
-    question = re.sub(r'^\s*\d+[\)\.\,]?\s*', '', question).strip()
+    question = _NUM_PREFIX.sub('', question).strip()
     answer = answer.strip()
     question = question.replace(',', ';')
     answer = answer.replace(',', ';')
-    question = re.sub(r';+\s*$', '', question).strip()
-    answer = re.sub(r';+\s*$', '', answer).strip()
+    question = _TRAILING_SEMI.sub('', question).strip()
+    answer = _TRAILING_SEMI.sub('', answer).strip()
     return question, answer
 
+def _parse_and_sanitize_vectorized(lines: List[str]) -> List[Tuple[str, str]]:
+    """Same result as the per-line loop in parse_and_sanitize_pairs, using pandas string ops."""
+    lines = pd.Series(lines, dtype=object)
+    lines = lines[lines.str.strip() != ""]
+    clean = lines.str.replace(_NUM_PREFIX, '', regex=True).str.strip()
+    by_qmark = clean.str.extract(_Q_COMMA_SPLIT)
+    parts = by_qmark.where(by_qmark[0].notna(), clean.str.extract(_COMMA_SPLIT)).dropna()
+
+    # sanitize_pair, column-wise
+    q = parts[0].str.strip().str.replace(_NUM_PREFIX, '', regex=True).str.strip()
+    a = parts[1].str.strip()
+    q = q.str.replace(',', ';', regex=False).str.replace(_TRAILING_SEMI, '', regex=True).str.strip()
+    a = a.str.replace(',', ';', regex=False).str.replace(_TRAILING_SEMI, '', regex=True).str.strip()
+    keep = (q != "") & (a != "")
+    return list(zip(q[keep], a[keep]))
+
 def parse_and_sanitize_pairs(raw: str) -> List[Tuple[str, str]]:
+    lines = raw.splitlines()
+    if len(lines) >= VECTORIZE_MIN_LINES:
+        return _parse_and_sanitize_vectorized(lines)
+
     pairs = []
-    for line in raw.splitlines():
+    for line in lines:
         if not line.strip():
             continue
         # Remove numbering at start
-        line_clean = re.sub(r'^\s*\d+[\)\.\,]?\s*', '', line).strip()
+        line_clean = _NUM_PREFIX.sub('', line).strip()
 
         # Try to split on ", " right after a question mark
-        m = re.search(r'\?(,)', line_clean)
+        m = _QMARK_COMMA.search(line_clean)
         if m:
             split_idx = m.end(1)
             q_raw = line_clean[: m.start(1) + 1].strip()  # includes '?'
@@ -105,13 +249,23 @@ Do you have Wi-Fi?,Yes; complimentary Wi-Fi is available throughout the hotel.
 Summary:
 \"\"\"{combined_summary}\"\"\"
 """
-    raw_response = call_llm_model(
-        model=LLM_MODEL,
+    lines = stream_llm_lines(
         prompt=prompt,
         max_tokens=1500,
-        temperature=0.3
+        temperature=0.3,
+        tier="balanced",
     )
 
-    parsed_pairs = parse_and_sanitize_pairs(raw_response)
+    # Lines are independent pairs, so parse them as they stream in and stop the
+    # generation as soon as enough pairs have arrived
+    raw_lines = []
+    parsed_pairs = []
+    for line in lines:
+        raw_lines.append(line)
+        parsed_pairs.extend(parse_and_sanitize_pairs(line))
+        if len(parsed_pairs) >= desired_count:
+            lines.close()
+            break
 
+    raw_response = "\n".join(raw_lines).strip()
     return raw_response, parsed_pairs
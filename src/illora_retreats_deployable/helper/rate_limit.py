@@ -0,0 +1,124 @@
+import os
+import re
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import List, Mapping
+
+# Groq account limits; requests wait for capacity up front instead of bouncing off 429s
+GROQ_RPM = int(os.getenv("GROQ_RPM", "30"))
+GROQ_TPM = int(os.getenv("GROQ_TPM", "12000"))
+
+WINDOW_SECONDS = 60.0
+# pause until the provider's reset once less than this share of a limit is left
+LOW_WATERMARK = 0.10
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+_UNIT_SECONDS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+def parse_reset(value: str) -> float:
+    """Seconds in a Groq reset header such as '7.66s', '2m59.56s' or '120ms'."""
+    return sum(float(n) * _UNIT_SECONDS[u] for n, u in _DURATION_PART.findall(value or ""))
+
+def estimate_tokens(prompt: str, max_tokens: int) -> int:
+    """Upper bound used to reserve TPM before the call (~4 characters per token)."""
+    return len(prompt) // 4 + max_tokens
+
+class SlidingWindowLimiter:
+    """
+    Requests-per-minute and tokens-per-minute budget over a sliding 60 s window.
+    Thread-safe; `acquire` blocks worker threads, `acquire_async` suspends the coroutine.
+    """
+
+    def __init__(self, rpm: int, tpm: int):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._calls = deque()  # [timestamp, tokens] per request still inside the window
+        self._tokens = 0
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: int):
+        """Record the call and return its entry, or the seconds to wait before asking again."""
+        with self._lock:
+            now = time.monotonic()
+            while self._calls and now - self._calls[0][0] >= WINDOW_SECONDS:
+                self._tokens -= self._calls.popleft()[1]
+            if now < self._paused_until:
+                return self._paused_until - now
+            # a single call larger than the whole TPM budget only waits for an empty window
+            tokens_fit = self._tokens + tokens <= self.tpm or not self._calls
+            if len(self._calls) < self.rpm and tokens_fit:
+                entry = [now, tokens]
+                self._calls.append(entry)
+                self._tokens += tokens
+                return entry
+            return self._calls[0][0] + WINDOW_SECONDS - now
+
+    def acquire(self, tokens: int) -> List:
+        while True:
+            got = self._reserve(tokens)
+            if isinstance(got, list):
+                return got
+            time.sleep(got)
+
+    async def acquire_async(self, tokens: int) -> List:
+        while True:
+            got = self._reserve(tokens)
+            if isinstance(got, list):
+                return got
+            await asyncio.sleep(got)
+
+    def settle(self, entry: List, actual_tokens: int):
+        """Replace the up-front estimate with the usage the API reported."""
+        with self._lock:
+            if any(e is entry for e in self._calls):
+                self._tokens += actual_tokens - entry[1]
+            entry[1] = actual_tokens
+
+    def observe_headers(self, headers: Mapping[str, str]):
+        """Honour x-ratelimit-* headers: stop sending when under LOW_WATERMARK of either limit remains."""
+        pause = 0.0
+        for kind in ("requests", "tokens"):
+            try:
+                limit = float(headers.get(f"x-ratelimit-limit-{kind}") or 0)
+                remaining = float(headers.get(f"x-ratelimit-remaining-{kind}") or 0)
+            except ValueError:
+                continue
+            if limit and remaining < limit * LOW_WATERMARK:
+                pause = max(pause, parse_reset(headers.get(f"x-ratelimit-reset-{kind}", "")))
+        if pause:
+            with self._lock:
+                self._paused_until = max(self._paused_until, time.monotonic() + pause)
+
+class AdaptiveConcurrency:
+    """
+    Async concurrency gate with AIMD sizing: +0.5 slot per success, halved on a 429.
+    Use as `async with gate:` around each request.
+    """
+
+    def __init__(self, start: float = 8, minimum: float = 1, maximum: float = 32):
+        self.limit = float(start)
+        self.minimum = minimum
+        self.maximum = maximum
+        self._inflight = 0
+        self._cond = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._inflight < int(self.limit))
+            self._inflight += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        async with self._cond:
+            self._inflight -= 1
+            if getattr(exc, "status_code", None) == 429:
+                self.limit = max(self.minimum, self.limit * 0.5)
+            elif exc is None:
+                self.limit = min(self.maximum, self.limit + 0.5)
+            self._cond.notify_all()
+        return False
+
+groq_limiter = SlidingWindowLimiter(rpm=GROQ_RPM, tpm=GROQ_TPM)
@@ -1,63 +1,137 @@
 # summarizer.py
 
 import os
-import json
-from groq import Groq
+import orjson
+import asyncio
+import httpx
+from groq import AsyncGroq
 from dotenv import load_dotenv
 import logging
 
+from helper.llm_cache import make_key, cache_get, cache_set
+from helper.rate_limit import groq_limiter, estimate_tokens, AdaptiveConcurrency
+
 load_dotenv()
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-client = Groq(api_key=GROQ_API_KEY)
 
 LOG_PATH = 'bot.log'
 SUMMARY_OUTPUT_PATH = "summary_log.jsonl"
+# marks a chat turn logged by the web channel
+WEB_INFO_SEP = b" | web | INFO | "
 
+# Sessions summarized at once to start with; grows on success and halves on a 429.
+# All of them share one keep-alive HTTP/2 connection pool
+MAX_CONCURRENT_SUMMARIES = 8
+# completion tokens reserved per summary in the TPM window until the real usage is known
+SUMMARY_TOKEN_ESTIMATE = 512
+# Short sessions are packed into one request (one round trip for up to K summaries);
+# a batch's transcripts stay under this many estimated prompt tokens
+MAX_SESSIONS_PER_BATCH = 8
+BATCH_PROMPT_TOKENS = 6000
+SUMMARY_MODEL = "llama-3.1-8b-instant"
 
-def extract_conversations(log_file_path):
-    sessions = {}
 
-    with open(log_file_path, "r", encoding="ISO-8859-1") as f:
-        for line in f:
-            if "INFO" not in line:
+def make_client():
+    """AsyncGroq client over a pooled HTTP/2 transport; bound to the event loop that uses it."""
+    http_client = httpx.AsyncClient(
+        http2=True,
+        timeout=httpx.Timeout(30.0),
+        limits=httpx.Limits(max_keepalive_connections=32),
+    )
+    return AsyncGroq(api_key=GROQ_API_KEY, http_client=http_client)
+
+
+def iter_log_entries(log_file_path):
+    """Yield (session_id, entry) for every well-formed INFO line of the log, one line at a time."""
+    with open(log_file_path, "rb") as f:
+        for raw in f:
+            # one scan on the raw bytes both rejects non-chat lines and splits off the timestamp;
+            # only accepted lines get decoded
+            timestamp, sep, log_body = raw.partition(WEB_INFO_SEP)
+            if not sep:
                 continue
+            timestamp = timestamp.decode("ISO-8859-1")
+            log_body = log_body.decode("ISO-8859-1")
 
             try:
-                timestamp, _, log_body = line.partition(" | web | INFO | ")
-                source, session_id, user_input, response, *rest = log_body.strip().split(" | ")
-                intent = rest[0].replace("Intent: ", "") if rest else None
-
-                if session_id not in sessions:
-                    sessions[session_id] = []
-
-                sessions[session_id].append({
-                    "user": user_input,
-                    "bot": response,
-                    "intent": intent,
-                    "timestamp": timestamp
-                })
+                source, session_id, user_input, response, *rest = log_body.strip().split(" | ", 4)
+                intent = rest[0].split(" | ", 1)[0].replace("Intent: ", "") if rest else None
             except Exception:
                 continue  # skip malformed lines
 
+            yield session_id, {
+                "user": user_input,
+                "bot": response,
+                "intent": intent,
+                "timestamp": timestamp
+            }
+
+
+def extract_conversations(log_file_path, skip_ids=frozenset()):
+    """Group log entries by session; sessions in `skip_ids` are never held in memory."""
+    sessions = {}
+    for session_id, entry in iter_log_entries(log_file_path):
+        if session_id in skip_ids:
+            continue
+        sessions.setdefault(session_id, []).append(entry)
     return sessions
 
 
+def index_path(summary_path):
+    """Side file listing one summarized session id per line, appended alongside the JSONL."""
+    return os.path.splitext(summary_path)[0] + ".idx"
+
+
 def get_existing_session_ids(summary_path):
+    if not os.path.exists(summary_path):
+        return set()
+
+    # the index is written after the JSONL, so it is current unless the JSONL changed behind it
+    idx = index_path(summary_path)
+    if os.path.exists(idx) and os.path.getmtime(idx) >= os.path.getmtime(summary_path):
+        with open(idx, "r", encoding="utf-8") as f:
+            return set(f.read().splitlines())
+
+    # missing or stale index: one full pass over the JSONL, then rewrite the index
     existing_ids = set()
-    if os.path.exists(summary_path):
-        with open(summary_path, "r", encoding="ISO-8859-1") as f:
-            for line in f:
-                try:
-                    existing_ids.add(json.loads(line)["session_id"])
-                except:
-                    continue
+    with open(summary_path, "rb") as f:
+        for line in f:
+            try:
+                existing_ids.add(orjson.loads(line)["session_id"])
+            except:
+                continue
+    with open(idx, "w", encoding="utf-8") as f:
+        f.writelines(f"{sid}\n" for sid in existing_ids)
     return existing_ids
 
 
-def summarize_with_groq(session_id, messages):
-    chat_log = ""
-    for msg in messages:
-        chat_log += f"User: {msg['user']}\nBot: {msg['bot']}\n"
+def format_chat_log(messages):
+    return "".join(f"User: {msg['user']}\nBot: {msg['bot']}\n" for msg in messages)
+
+
+async def complete(client, prompt, completion_tokens, **kwargs):
+    """One rate-limited chat completion; returns the stripped message text."""
+    slot = await groq_limiter.acquire_async(estimate_tokens(prompt, completion_tokens))
+    raw = await client.chat.completions.with_raw_response.create(
+        model=SUMMARY_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        **kwargs
+    )
+    groq_limiter.observe_headers(raw.headers)
+    completion = await raw.parse()
+    if completion.usage:
+        groq_limiter.settle(slot, completion.usage.total_tokens)
+    return completion.choices[0].message.content.strip()
+
+
+def split_summary(summary_response):
+    """(summary, follow_up_email) from a single-session response."""
+    summary, follow_up = summary_response.split("Follow-up", 1)
+    return summary.strip(), ("Follow-up" + follow_up).strip()
+
+
+async def summarize_with_groq(client, session_id, messages):
+    chat_log = format_chat_log(messages)
 
     prompt = f"""
 You are a summarization agent for a hotel chatbot named 'AI Chieftain', deployed at a luxury hotel to assist guests with queries about services, amenities, booking, restaurant, travel desk, etc.
@@ -69,44 +143,144 @@ Conversation:
 {chat_log}
 """
 
-    completion = client.chat.completions.create(
-        model="llama-3.1-8b-instant",
-        messages=[{"role": "user", "content": prompt}]
+    # keyed on the transcript itself, so a re-sweep skips sessions already summarized even
+    # when summary_log.jsonl was rotated, while sessions that gained lines are redone
+    key = make_key("session-summary", session_id, make_key(chat_log))
+    cached = cache_get(key)
+    if cached is not None and "Follow-up" in cached:
+        return cached
+
+    summary = await complete(client, prompt, SUMMARY_TOKEN_ESTIMATE)
+    # only answers split_summary can use are cached; a malformed one fails this sweep and is
+    # asked for again on the next run
+    if "Follow-up" not in summary:
+        raise ValueError("response has no Follow-up section")
+    cache_set(key, summary)
+    return summary
+
+
+async def summarize_batch_with_groq(client, batch):
+    """
+    Summarize several sessions with one request. `batch` is [(session_id, messages), ...];
+    returns {session_id: (summary, follow_up_email)} for the sessions the model answered.
+    """
+    chat_logs = {sid: format_chat_log(msgs) for sid, msgs in batch}
+    keys = {sid: make_key("session-summary-batch", sid, make_key(log)) for sid, log in chat_logs.items()}
+
+    results = {}
+    for sid, key in keys.items():
+        cached = cache_get(key)
+        if cached is not None:
+            results[sid] = tuple(orjson.loads(cached))
+    todo = [sid for sid in chat_logs if sid not in results]
+    if not todo:
+        return results
+
+    conversations = "\n".join(f"===SESSION {sid}===\n{chat_logs[sid]}" for sid in todo)
+    prompt = f"""
+You are a summarization agent for a hotel chatbot named 'AI Chieftain', deployed at a luxury hotel to assist guests with queries about services, amenities, booking, restaurant, travel desk, etc.
+
+Below are {len(todo)} separate conversations between guests and the bot, each starting with a ===SESSION <id>=== line.
+For each conversation, summarize it in clear bullet points, then write a professional and polite follow-up message from the hotel side, reiterating what was discussed and offering further assistance. The follow-up must start with "Follow-up".
+
+Respond with a JSON object of the form {{"summaries": [{{"session_id": "<id>", "summary": "...", "follow_up": "Follow-up ..."}}]}} with one entry per conversation.
+
+Conversations:
+{conversations}
+"""
+    content = await complete(
+        client, prompt, SUMMARY_TOKEN_ESTIMATE * len(todo),
+        response_format={"type": "json_object"},
     )
 
-    return completion.choices[0].message.content.strip()
+    wanted = set(todo)
+    for item in orjson.loads(content).get("summaries", []):
+        sid = str(item.get("session_id", ""))
+        summary, follow_up = item.get("summary"), item.get("follow_up")
+        if sid in wanted and summary and follow_up:
+            results[sid] = (summary.strip(), follow_up.strip())
+            cache_set(keys[sid], orjson.dumps(results[sid]).decode())
+    return results
 
 
-def save_summary(session_id, summary_response):
+def pack_batches(pending):
+    """
+    Group pending sessions into batches of at most MAX_SESSIONS_PER_BATCH whose transcripts fit
+    BATCH_PROMPT_TOKENS (~4 chars per token); a session too long to share goes alone.
+    """
+    batches, current, current_tokens = [], [], 0
+    for sid, msgs in pending.items():
+        tokens = estimate_tokens(format_chat_log(msgs), 0)
+        if current and (len(current) >= MAX_SESSIONS_PER_BATCH or current_tokens + tokens > BATCH_PROMPT_TOKENS):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append((sid, msgs))
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
 
-    summary, follow_up = summary_response.split("Follow-up", 1)
-    follow_up_email = "Follow-up" + follow_up
 
-    with open(SUMMARY_OUTPUT_PATH, "a", encoding="ISO-8859-1") as f:
-        f.write(json.dumps({
-            "session_id": session_id,
-            "summary": summary.strip(),
-            "follow_up_email": follow_up_email.strip()
-        }) + "\n")
+def save_summary(out, idx_out, session_id, summary, follow_up_email):
+    """Append one JSONL record to `out` and its id to `idx_out` (both opened once per sweep)."""
+    out.write(orjson.dumps({
+        "session_id": session_id,
+        "summary": summary,
+        "follow_up_email": follow_up_email
+    }) + b"\n")
+    idx_out.write(f"{session_id}\n")
 
 
-def main():
-    sessions = extract_conversations(LOG_PATH)
+async def summarize_all():
     existing_ids = get_existing_session_ids(SUMMARY_OUTPUT_PATH)
-    print(f"Total sessions found: {len(sessions)} | Already summarized: {len(existing_ids)}")
+    # already-summarized sessions are dropped while reading the log
+    pending = extract_conversations(LOG_PATH, skip_ids=existing_ids)
+    print(f"Sessions to summarize: {len(pending)} | Already summarized: {len(existing_ids)}")
+    if not pending:
+        return
 
-    for session_id, messages in sessions.items():
-        if session_id in existing_ids:
-            print(f"Skipping already summarized session: {session_id}")
-            continue
+    gate = AdaptiveConcurrency(start=MAX_CONCURRENT_SUMMARIES)
+
+    # one handle per file for the whole sweep instead of an open/close per session; the index
+    # is opened first so it is closed (and stamped) after the JSONL
+    with open(index_path(SUMMARY_OUTPUT_PATH), "a", encoding="utf-8") as idx_out, \
+            open(SUMMARY_OUTPUT_PATH, "ab", buffering=1 << 16) as out:
+        async with make_client() as client:
+            async def summarize_one(session_id, messages):
+                try:
+                    async with gate:
+                        print(f"Summarizing session: {session_id}")
+                        summary = await summarize_with_groq(client, session_id, messages)
+                    # single-threaded event loop, so appends to the output file never interleave
+                    save_summary(out, idx_out, session_id, *split_summary(summary))
+                    print(f"Saved summary for session {session_id}")
+                except Exception as e:
+                    print(f"Failed to summarize session {session_id}: {e}")
+
+            async def summarize_batch(batch):
+                if len(batch) == 1:
+                    await summarize_one(*batch[0])
+                    return
+                results = {}
+                try:
+                    async with gate:
+                        print(f"Summarizing {len(batch)} sessions in one request")
+                        results = await summarize_batch_with_groq(client, batch)
+                except Exception as e:
+                    print(f"Batch request failed ({e}); summarizing its sessions one by one")
+                for session_id, messages in batch:
+                    if session_id in results:
+                        save_summary(out, idx_out, session_id, *results[session_id])
+                        print(f"Saved summary for session {session_id}")
+                    else:
+                        # missing or malformed in the batch answer
+                        await summarize_one(session_id, messages)
 
-        print(f"Summarizing session: {session_id}")
-        try:
-            summary = summarize_with_groq(session_id, messages)
-            save_summary(session_id, summary)
-            print(f"Saved summary for session {session_id}")
-        except Exception as e:
-            print(f"Failed to summarize session {session_id}: {e}")
+            await asyncio.gather(*(summarize_batch(batch) for batch in pack_batches(pending)))
+
+
+def main():
+    asyncio.run(summarize_all())
 
 
 if __name__ == "__main__":
@@ -1,9 +1,13 @@
 import os
 import time
-from typing import Tuple
+import httpx
+from typing import Optional, Tuple
 
 from config import LLM_MODEL, MAX_SUMMARY_TOKENS
 from utils_data import extract_hotel_name
+# same module paths as helper/summarizer.py, so the process has one cache connection and one limiter
+from helper.llm_cache import make_key, cache_get, cache_set
+from helper.rate_limit import groq_limiter, estimate_tokens
 
 # Groq SDK
 try:
@@ -15,34 +19,69 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 if not GROQ_API_KEY:
     raise RuntimeError("GROQ_API_KEY not set in environment variables.")
 
-_client = Groq(api_key=GROQ_API_KEY)
+# One client for the process: every call reuses the same keep-alive HTTP/2 pool instead of
+# a fresh TLS handshake. SDK retries are off because call_llm_model retries itself.
+_http_client = httpx.Client(
+    http2=True,
+    timeout=httpx.Timeout(30.0),
+    limits=httpx.Limits(max_keepalive_connections=32),
+)
+_client = Groq(api_key=GROQ_API_KEY, http_client=_http_client, max_retries=0)
 
-def call_llm_model(model: str, prompt: str, max_tokens: int, temperature: float) -> str:
+# Model per latency tier: short/cheap prompts go to the 8B instant model, heavy ones to the
+# configured LLM_MODEL (70B when unset)
+SPEED_MAP = {
+    "instant": "llama-3.1-8b-instant",
+    "balanced": LLM_MODEL or "llama-3.3-70b-versatile",
+}
+
+def call_llm_model(prompt: str, max_tokens: int, temperature: float, tier: str = "balanced", model: Optional[str] = None) -> str:
     """
     Calls Groq's model and returns generated text. Retries on failure.
+    Completions are cached on disk per (model, temperature, max_tokens, prompt).
+    `tier` picks the model from SPEED_MAP; pass `model` only to pin a specific one.
     """
+    model = model or SPEED_MAP.get(tier, LLM_MODEL)
+    key = make_key(model, temperature, max_tokens, prompt)
+    cached = cache_get(key)
+    if cached is not None:
+        return cached
+
     retries = 3
     backoff_base = 1.0
     last_exc = None
     for attempt in range(1, retries + 1):
+        # waits here while the shared RPM/TPM window is full
+        slot = groq_limiter.acquire(estimate_tokens(prompt, max_tokens))
         try:
-            resp = _client.chat.completions.create(
-                model=model or LLM_MODEL,
+            raw = _client.chat.completions.with_raw_response.create(
+                model=model,
                 messages=[
                     {"role": "system", "content": "You are a helpful assistant."},
                     {"role": "user", "content": prompt},
                 ],
                 max_tokens=max_tokens,
                 temperature=temperature,
+                service_tier="auto",
             )
+            groq_limiter.observe_headers(raw.headers)
+            resp = raw.parse()
+            if resp.usage:
+                groq_limiter.settle(slot, resp.usage.total_tokens)
             content = resp.choices[0].message.content
             if isinstance(content, bytes):
                 content = content.decode("utf-8", errors="ignore")
-            return content.strip()
+            content = content.strip()
+            cache_set(key, content)
+            return content
         except Exception as e:
             last_exc = e
-            sleep_time = backoff_base * (2 ** (attempt - 1))
-            time.sleep(sleep_time)
+            response = getattr(e, "response", None)
+            if getattr(e, "status_code", None) == 429 and response is not None:
+                # the limiter holds the next attempt until the provider's reset
+                groq_limiter.observe_headers(response.headers)
+            else:
+                time.sleep(backoff_base * (2 ** (attempt - 1)))
     raise RuntimeError(f"Failed to call Groq after {retries} attempts. Last error: {last_exc}")
 
 def summarize_text(doc_name: str, text: str) -> Tuple[str, str]:
@@ -55,9 +94,9 @@ Document content:
 
 Provide the summary as bullet points."""
     summary = call_llm_model(
-        model=LLM_MODEL,
         prompt=prompt,
         max_tokens=MAX_SUMMARY_TOKENS,
-        temperature=0.2
+        temperature=0.2,
+        tier="balanced",
     )
     return summary.strip(), hotel_name
@@ -1,48 +1,97 @@
 import os
 import re
-from fuzzywuzzy import fuzz
+import logging
+import numpy as np
+from functools import lru_cache
+from rapidfuzz import fuzz, process, utils
+
+logger = logging.getLogger(__name__)
+
+# Small local sentence encoder used to catch paraphrased answers in dedupe_answers
+DEDUPE_EMBED_MODEL = os.getenv("DEDUPE_EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+
+_WS = re.compile(r'\s+')
+
+# The hotel name sits near the top of a document; only this much of it is scanned
+HOTEL_NAME_SCAN_CHARS = 8000
+
+# Tried in order; the first match wins. They stay separate patterns: one alternation would
+# return the leftmost match instead ("Welcome to Hotel Luxoria" -> "Welcome to Hotel")
+_HOTEL_PATTERNS = [
+    re.compile(p, re.IGNORECASE)
+    for p in (
+        r'Hotel\s+([A-Z][\w& ]{2,})',
+        r'([A-Z][\w& ]{2,}Suites?)',
+        r'([A-Z][\w& ]{2,}Inn)',
+        r'([A-Z][\w& ]{2,}Resort)',
+        r'([A-Z][\w& ]{2,}Hotel)',
+    )
+]
 
 def clean_text(text: str) -> str:
-    return re.sub(r'\s+', ' ', text).strip()
+    return _WS.sub(' ', text).strip()
 
 def ensure_dir(path: str):
     os.makedirs(os.path.dirname(path), exist_ok=True)
 
-def dedupe_answers(qa_pairs, similarity_threshold=90):
-    unique = []
-    seen = []
-    for q, a in qa_pairs:
-        is_dup = False
-        for existing in seen:
-            if fuzz.token_set_ratio(a, existing) >= similarity_threshold:
-                is_dup = True
-                break
-        if not is_dup:
-            unique.append((q, a))
-            seen.append(a)
-    return unique
+@lru_cache(maxsize=1)
+def _dedupe_embedder():
+    # imported lazily: loading torch is only worth it once dedupe actually runs
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(DEDUPE_EMBED_MODEL)
+
+def _semantic_duplicates(answers, threshold):
+    """Boolean matrix of answer pairs whose embedding cosine similarity is >= threshold."""
+    emb = _dedupe_embedder().encode(answers, normalize_embeddings=True, batch_size=64, show_progress_bar=False)
+    emb = np.asarray(emb, dtype=np.float32)
+    # normalized rows, so one matrix product (BLAS) gives every cosine similarity
+    return (emb @ emb.T) >= threshold
+
+def dedupe_answers(qa_pairs, similarity_threshold=90, semantic_threshold=0.85):
+    """
+    Keep each pair unless its answer duplicates an answer already kept, either lexically
+    (token_set_ratio >= similarity_threshold) or in meaning (embedding cosine >= semantic_threshold).
+    Both similarity matrices are computed in one shot (rapidfuzz in C, embeddings via BLAS);
+    only the greedy pick is Python. Without sentence-transformers only the lexical check runs.
+    """
+    if not qa_pairs:
+        return []
+    answers = [a for _, a in qa_pairs]
+    # fuzzywuzzy rounded scores to ints, so anything from threshold - 0.5 up counted as a match
+    scores = process.cdist(
+        answers, answers,
+        scorer=fuzz.token_set_ratio,
+        processor=utils.default_process,
+        score_cutoff=similarity_threshold - 0.5,
+        workers=-1,
+    )
+    dup = scores > 0
+    if semantic_threshold is not None:
+        try:
+            dup |= _semantic_duplicates(answers, semantic_threshold)
+        except Exception as e:
+            logger.warning("Semantic dedupe unavailable, using lexical only: %s", e)
+
+    kept = np.ones(len(answers), dtype=bool)
+    for i in range(len(answers)):
+        if kept[i]:
+            kept[i + 1:] &= ~dup[i, i + 1:]
+    return [qa_pairs[i] for i in np.flatnonzero(kept)]
 
 def extract_hotel_name(text: str) -> str:
     """
     Heuristically extract hotel name: patterns like 'Hotel <Name>', '<Name> Suites', title headings, etc.
     """
-    patterns = [
-        r'Hotel\s+([A-Z][\w& ]{2,})',
-        r'([A-Z][\w& ]{2,}Suites?)',
-        r'([A-Z][\w& ]{2,}Inn)',
-        r'([A-Z][\w& ]{2,}Resort)',
-        r'([A-Z][\w& ]{2,}Hotel)',
-    ]
-    for pat in patterns:
-        m = re.search(pat, text, flags=re.IGNORECASE)
+    text = text[:HOTEL_NAME_SCAN_CHARS]
+    for pat in _HOTEL_PATTERNS:
+        m = pat.search(text)
         if m:
             name = m.group(1).strip()
             return name.title()
 
     # Fallback: first non-empty line that looks like a heading
-    lines = [l.strip() for l in text.splitlines() if l.strip()]
-    if lines:
-        first = lines[0]
+    first = next((l.strip() for l in text.splitlines() if l.strip()), None)
+    if first:
         if len(first.split()) <= 6 and (first.isupper() or first.istitle()):
             return first.title()
     return "Unknown Hotel"
@@ -1,33 +1,29 @@
 # pre_check_in/booking_flow.py
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from .database import init_db, get_db, Room, Booking
+from .database import init_db, get_db, Room, Booking, BookingStatus
 from .pricing import calculate_price_for_room
-from .media import get_youtube_preview, get_instagram_preview
+from .media import fetch_preview
 from .payment import create_stripe_checkout_for_booking, generate_qr_image_bytes
 from sqlalchemy.orm import Session
 
 init_db()
 
-def create_booking_record(db: Session, guest_name, guest_phone, room_id, check_in, check_out, price, channel="web", channel_user=None):
-    booking_id = str(uuid.uuid4())
+def create_booking_record(db: Session, guest_name, guest_phone, room_id, check_in, check_out, price, channel="web", channel_user=None, booking_id=None, stripe_session_id=None):
     b = Booking(
-        id=booking_id,
+        id=booking_id or str(uuid.uuid4()),
         guest_name=guest_name,
         guest_phone=guest_phone,
         room_id=room_id,
         check_in=check_in,
         check_out=check_out,
         price=price,
-        status=Booking.status.property.columns[0].type.enum_class.pending,  # fallback handled next
+        status=BookingStatus.pending,
+        stripe_session_id=stripe_session_id,
         channel=channel,
         channel_user=channel_user
     )
-    # SQLAlchemy enum typing is handled; do generic assignment
-    b.status = Booking.status.type.enum_class.pending if False else b.status  # noop to avoid lint; we'll set explicitly below
-    # Instead set directly:
-    from .database import BookingStatus
-    b.status = BookingStatus.pending
     db.add(b)
     db.commit()
     db.refresh(b)
@@ -39,20 +35,20 @@ def start_booking_flow(db: Session, room: Room, check_in, check_out, guest_name=
     Returns a dict with price, nights, media previews, stripe checkout url and booking_id.
     """
     price, nights = calculate_price_for_room(db, room, check_in, check_out)
+    # previews are independent HTTP lookups; fetch them concurrently (map keeps media order)
+    media = room.media or []
     media_previews = []
-    for m in (room.media or []):
-        if "youtube.com" in m or "youtu.be" in m:
-            media_previews.append(get_youtube_preview(m))
-        else:
-            media_previews.append(get_instagram_preview(m))
+    if media:
+        with ThreadPoolExecutor(max_workers=min(8, len(media))) as ex:
+            media_previews = list(ex.map(fetch_preview, media))
 
-    # create booking record with pending status
-    booking = create_booking_record(db, guest_name or "Guest", guest_phone or "", room.id, check_in, check_out, price, channel=channel, channel_user=channel_user)
+    # create the stripe session first so the pending booking is inserted with its
+    # session id in a single commit
+    booking_id = str(uuid.uuid4())
+    session = create_stripe_checkout_for_booking(booking_id, price)
 
-    # create stripe session
-    session = create_stripe_checkout_for_booking(booking.id, price)
-    booking.stripe_session_id = session.id
-    db.commit()
+    # create booking record with pending status
+    booking = create_booking_record(db, guest_name or "Guest", guest_phone or "", room.id, check_in, check_out, price, channel=channel, channel_user=channel_user, booking_id=booking_id, stripe_session_id=session.id)
 
     return {
         "booking_id": booking.id,
@@ -1,12 +1,26 @@
 # pre_check_in/database.py
 import os
+import orjson
 from sqlalchemy import create_engine, Column, Integer, String, Date, DateTime, Float, Enum, JSON, ForeignKey, Table, MetaData
 from sqlalchemy.orm import sessionmaker, declarative_base, relationship
 from datetime import datetime
 import enum
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./illora.db")
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {})
+# JSON columns (Room.media) are encoded/decoded with orjson instead of the stdlib json module.
+# A larger compiled-statement cache keeps the webhook/pricing statement shapes compiled once per
+# process; pre-ping drops connections the server closed while idle.
+# pool_size only for server databases: SQLAlchemy < 2.0 gives file SQLite a NullPool, which rejects it
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False} if IS_SQLITE else {},
+    query_cache_size=1200,
+    pool_pre_ping=True,
+    **({} if IS_SQLITE else {"pool_size": 10}),
+    json_serializer=lambda obj: orjson.dumps(obj).decode(),
+    json_deserializer=orjson.loads,
+)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 Base = declarative_base()
 
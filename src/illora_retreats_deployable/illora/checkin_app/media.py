@@ -1,56 +1,93 @@
 # pre_check_in/media.py
 import os
 import requests
+import threading
+import urllib.parse as up
+from cachetools import TTLCache
+from requests.adapters import HTTPAdapter
 
 YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
 INSTAGRAM_ACCESS_TOKEN = os.getenv("INSTAGRAM_ACCESS_TOKEN")
 
-def get_youtube_preview(video_url):
-    """
-    Try YouTube Data API to get best thumbnail + title. If API key missing,
-    fallback to standard thumbnail URL.
-    """
+# Keep-alive session shared by the preview fetchers (booking_flow fetches up to 8 at once)
+_media_client = requests.Session()
+_media_client.mount("https://", HTTPAdapter(pool_maxsize=8))
+
+# Media URLs are near-static, so previews are cached per URL. Only complete answers are kept:
+# a fallback built after a failed or rejected API call is retried on the next request.
+_preview_cache: TTLCache = TTLCache(maxsize=1024, ttl=6 * 3600)
+_preview_cache_lock = threading.Lock()
+
+
+def _cached_preview(url, fetch):
+    """Return a copy of the cached preview for `url`, calling `fetch(url) -> (preview, cacheable)` on a miss."""
+    with _preview_cache_lock:
+        preview = _preview_cache.get(url)
+    if preview is None:
+        preview, cacheable = fetch(url)
+        if cacheable:
+            with _preview_cache_lock:
+                _preview_cache[url] = preview
+    return dict(preview)
+
+
+def _fetch_youtube_preview(video_url):
     try:
         if "youtu.be/" in video_url:
             vid = video_url.split("youtu.be/")[-1].split("?")[0]
         else:
             # parse v= parameter
-            import urllib.parse as up
             q = up.urlparse(video_url).query
             params = up.parse_qs(q)
             vid = params.get("v", [None])[0]
         if not vid:
-            return {"thumbnail": None, "title": None, "url": video_url}
+            return {"thumbnail": None, "title": None, "url": video_url}, True
         if YOUTUBE_API_KEY:
             api = "https://www.googleapis.com/youtube/v3/videos"
             params = {"part":"snippet","id":vid,"key":YOUTUBE_API_KEY}
-            r = requests.get(api, params=params, timeout=8)
+            r = _media_client.get(api, params=params, timeout=8)
             if r.status_code == 200:
                 items = r.json().get("items", [])
                 if items:
                     snip = items[0]["snippet"]
                     thumb = snip["thumbnails"].get("high", snip["thumbnails"].get("default"))["url"]
-                    return {"thumbnail": thumb, "title": snip.get("title"), "url": video_url}
-        # fallback thumbnail
+                    return {"thumbnail": thumb, "title": snip.get("title"), "url": video_url}, True
+        # fallback thumbnail; final only when there is no API key to retry with
         thumb = f"https://img.youtube.com/vi/{vid}/hqdefault.jpg"
-        return {"thumbnail": thumb, "title": None, "url": video_url}
+        return {"thumbnail": thumb, "title": None, "url": video_url}, not YOUTUBE_API_KEY
     except Exception:
-        return {"thumbnail": None, "title": None, "url": video_url}
+        return {"thumbnail": None, "title": None, "url": video_url}, False
 
-def get_instagram_preview(insta_url):
+def get_youtube_preview(video_url):
     """
-    Instagram Basic Display or Graph API requires tokens and IDs. If token present,
-    try to fetch media_id -> media_url. Otherwise return the original URL (Twilio/Streamlit will show it)
+    Try YouTube Data API to get best thumbnail + title. If API key missing,
+    fallback to standard thumbnail URL.
     """
+    return _cached_preview(video_url, _fetch_youtube_preview)
+
+def _fetch_instagram_preview(insta_url):
     try:
         if INSTAGRAM_ACCESS_TOKEN:
             # naive attempt: call oembed as fallback (no token required for oembed)
             oembed = f"https://graph.facebook.com/v16.0/instagram_oembed?url={insta_url}"
-            r = requests.get(oembed, timeout=8)
+            r = _media_client.get(oembed, timeout=8)
             if r.status_code == 200:
                 data = r.json()
-                return {"thumbnail": data.get("thumbnail_url"), "title": data.get("title") or "", "url": insta_url}
-        # fallback: return URL only
-        return {"thumbnail": None, "title": None, "url": insta_url}
+                return {"thumbnail": data.get("thumbnail_url"), "title": data.get("title") or "", "url": insta_url}, True
+        # fallback: return URL only; final only when there is no token to retry with
+        return {"thumbnail": None, "title": None, "url": insta_url}, not INSTAGRAM_ACCESS_TOKEN
     except Exception:
-        return {"thumbnail": None, "title": None, "url": insta_url}
+        return {"thumbnail": None, "title": None, "url": insta_url}, False
+
+def get_instagram_preview(insta_url):
+    """
+    Instagram Basic Display or Graph API requires tokens and IDs. If token present,
+    try to fetch media_id -> media_url. Otherwise return the original URL (Twilio/Streamlit will show it)
+    """
+    return _cached_preview(insta_url, _fetch_instagram_preview)
+
+def fetch_preview(url):
+    """Preview for one room media URL: YouTube links via the YouTube API, anything else as Instagram."""
+    if "youtube.com" in url or "youtu.be" in url:
+        return get_youtube_preview(url)
+    return get_instagram_preview(url)
@@ -5,7 +5,16 @@ import qrcode
 from io import BytesIO
 from pathlib import Path
 
+try:
+    from stripe import RequestsClient
+except ImportError:  # stripe < 8
+    from stripe.http_client import RequestsClient
+
 stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
+# One requests.Session (keep-alive) for every checkout call instead of a TLS handshake per booking;
+# the SDK retries transient network errors with idempotency keys
+stripe.default_http_client = RequestsClient(timeout=10)
+stripe.max_network_retries = 2
 SUCCESS_URL = os.getenv("SUCCESS_URL")
 CANCEL_URL = os.getenv("CANCEL_URL")
 MEDIA_BASE_URL = os.getenv("MEDIA_BASE_URL")  # used to construct public QR URL if static hosted
@@ -36,7 +45,13 @@ def create_stripe_checkout_for_booking(booking_id: str, amount_inr: float, succe
     return session
 
 def generate_qr_image_bytes(booking_payload: str, filename: str):
-    img = qrcode.make(booking_payload)
+    # Short on-screen payloads: low error correction and small modules keep the matrix and PNG
+    # small; QR PNGs barely compress, so the fastest zlib level costs little size.
+    # QRCode is stateful, so one per call (safe across request threads)
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=6, border=2)
+    qr.add_data(booking_payload)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white")
     path = STATIC_DIR / filename
-    img.save(path)
+    img.save(path, format="PNG", compress_level=1)
     return str(path)  # local path; public path must be constructed by caller using MEDIA_BASE_URL
@@ -1,34 +1,76 @@
 # pre_check_in/pricing.py
-from datetime import datetime, timedelta
-from .database import get_db, Room, FestivalPricing
+import time
+import threading
+from datetime import datetime
+from .database import get_db, Room, FestivalPricing, Booking, BookingStatus
+from sqlalchemy import func, select, bindparam
 from sqlalchemy.orm import Session
 from math import ceil
 
+# festival_pricing is a small admin-edited table; keep it parsed in memory for this long
+FESTIVAL_CACHE_TTL = 60
+_festival_cache = {"loaded_at": 0.0, "windows": []}
+_festival_lock = threading.Lock()
+
 def nights_between(ci, co):
     return (co - ci).days
 
+def invalidate_festival_cache():
+    """Call after editing festival_pricing so the next price sees the change immediately."""
+    with _festival_lock:
+        _festival_cache["loaded_at"] = 0.0
+
+def _festival_windows(db: Session):
+    """(start, end, multiplier) per festival row, dates parsed; reloaded at most every FESTIVAL_CACHE_TTL s."""
+    with _festival_lock:
+        if time.monotonic() - _festival_cache["loaded_at"] < FESTIVAL_CACHE_TTL:
+            return _festival_cache["windows"]
+        windows = []
+        rows = db.query(FestivalPricing.start_date, FestivalPricing.end_date, FestivalPricing.multiplier).order_by(FestivalPricing.id)
+        for start_date, end_date, multiplier in rows:
+            try:
+                s = datetime.strptime(start_date, "%Y-%m-%d").date()
+                e = datetime.strptime(end_date, "%Y-%m-%d").date()
+            except Exception:
+                continue
+            windows.append((s, e, multiplier))
+        _festival_cache["windows"] = windows
+        _festival_cache["loaded_at"] = time.monotonic()
+        return windows
+
 def is_in_festival(check_in, check_out, db: Session):
-    fps = db.query(FestivalPricing).all()
-    for f in fps:
-        try:
-            s = datetime.strptime(f.start_date, "%Y-%m-%d").date()
-            e = datetime.strptime(f.end_date, "%Y-%m-%d").date()
-            # if any overlap, return multiplier (take max)
-            if (check_in <= e and check_out >= s):
-                return f.multiplier
-        except Exception:
-            continue
+    for s, e, multiplier in _festival_windows(db):
+        # if any overlap, return multiplier (take max)
+        if (check_in <= e and check_out >= s):
+            return multiplier
     return 1.0
 
-def demand_factor(db: Session, room: Room, check_in, check_out):
-    # count bookings overlapping (confirmed or pending)
-    from .database import Booking
-    booked = db.query(Booking).filter(
-        Booking.room_id == room.id,
-        Booking.status != Booking.status.enum_class.cancelled,
-        Booking.check_in < check_out,
-        Booking.check_out > check_in
-    ).count()
+# Built once at import; each call only binds values, so no per-call ORM expression building
+_OVERLAP_FILTER = (
+    Booking.status != BookingStatus.cancelled,
+    Booking.check_in < bindparam("co"),
+    Booking.check_out > bindparam("ci"),
+)
+_DEMAND_STMT = select(func.count()).select_from(Booking).where(
+    Booking.room_id == bindparam("rid"), *_OVERLAP_FILTER
+)
+_OVERLAP_BY_ROOM_STMT = select(Booking.room_id, func.count()).where(
+    Booking.room_id.in_(bindparam("rids", expanding=True)), *_OVERLAP_FILTER
+).group_by(Booking.room_id)
+
+def overlap_counts_by_room(db: Session, room_ids, check_in, check_out):
+    """{room_id: bookings overlapping the stay (confirmed or pending)} in one GROUP BY query."""
+    room_ids = list(room_ids)
+    rows = db.execute(_OVERLAP_BY_ROOM_STMT, {"rids": room_ids, "ci": check_in, "co": check_out})
+    counts = dict.fromkeys(room_ids, 0)
+    counts.update(rows.all())
+    return counts
+
+def demand_factor(db: Session, room: Room, check_in, check_out, booked=None):
+    # count bookings overlapping (confirmed or pending); availability searches pass
+    # `booked` from overlap_counts_by_room instead of querying once per room
+    if booked is None:
+        booked = db.execute(_DEMAND_STMT, {"rid": room.id, "ci": check_in, "co": check_out}).scalar()
     capacity = max(1, room.total_units)
     occupancy = booked / capacity
     factor = 1.0
@@ -40,21 +82,23 @@ def demand_factor(db: Session, room: Room, check_in, check_out):
         factor += 0.1
     return factor
 
+def _weekend_days_before(n):
+    """Saturdays/Sundays among day offsets 0..n-1 counted from a Monday."""
+    return (n // 7) * 2 + max(0, n % 7 - 5)
+
 def weekend_surcharge(check_in, check_out):
-    weekends = 0
-    cur = check_in
-    while cur < check_out:
-        if cur.weekday() in (5,6):
-            weekends += 1
-        cur += timedelta(days=1)
+    # Saturday/Sunday nights in [check_in, check_out), counted arithmetically instead of day by day
+    start = check_in.weekday()
+    nights = max(0, (check_out - check_in).days)
+    weekends = _weekend_days_before(start + nights) - _weekend_days_before(start)
     return 1.0 + 0.10 * weekends
 
-def calculate_price_for_room(db: Session, room: Room, check_in, check_out):
+def calculate_price_for_room(db: Session, room: Room, check_in, check_out, booked=None):
     nights = nights_between(check_in, check_out)
     if nights <= 0:
         raise ValueError("check_out must be after check_in")
     base_total = room.base_price * nights
-    demand = demand_factor(db, room, check_in, check_out)
+    demand = demand_factor(db, room, check_in, check_out, booked=booked)
     festival_mul = is_in_festival(check_in, check_out, db)
     weekend_mul = weekend_surcharge(check_in, check_out)
     total = base_total * demand * festival_mul * weekend_mul
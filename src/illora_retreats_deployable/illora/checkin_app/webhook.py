@@ -1,10 +1,16 @@
 # pre_check_in/webhook.py
-import os, json, stripe
-from fastapi import FastAPI, Request, Header, HTTPException
+import os, stripe
+from typing import Dict, Optional
+from pydantic import BaseModel, Field
+from fastapi import FastAPI, Request, Header, HTTPException, BackgroundTasks, Depends
 from sqlalchemy.orm import Session
-from .database import SessionLocal, Booking, BookingStatus
+from starlette.concurrency import run_in_threadpool
+from .database import SessionLocal, Booking, BookingStatus, get_db
 from .payment import generate_qr_image_bytes
+import requests
+from requests.adapters import HTTPAdapter
 from twilio.rest import Client
+from twilio.http.http_client import TwilioHttpClient
 
 app = FastAPI()
 stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
@@ -13,49 +19,101 @@ MEDIA_BASE_URL = os.getenv("MEDIA_BASE_URL")
 TWILIO_SID = os.getenv("TWILIO_ACCOUNT_SID")
 TWILIO_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
 TWILIO_FROM = os.getenv("TWILIO_WHATSAPP_FROM")
-twilio_client = Client(TWILIO_SID, TWILIO_TOKEN) if TWILIO_SID and TWILIO_TOKEN else None
+
+# Keep-alive pool for api.twilio.com so confirmations after the first skip the TCP+TLS handshake
+_twilio_session = requests.Session()
+_twilio_session.mount("https://", HTTPAdapter(pool_connections=20, pool_maxsize=50))
+_twilio_http = TwilioHttpClient(timeout=10)
+_twilio_http.session = _twilio_session
+twilio_client = Client(TWILIO_SID, TWILIO_TOKEN, http_client=_twilio_http) if TWILIO_SID and TWILIO_TOKEN else None
+
+# Only the fields the webhook reads; everything else in the event payload is skipped while parsing
+class CheckoutSessionObj(BaseModel):
+    id: Optional[str] = None
+    metadata: Optional[Dict[str, str]] = Field(default_factory=dict)
+
+class CheckoutSessionData(BaseModel):
+    object: CheckoutSessionObj
+
+# Every event is only checked for its type; the checkout shape is parsed for that one event, so
+# other event types Stripe sends are acknowledged instead of failing validation
+class StripeEvent(BaseModel):
+    type: str
+
+class CheckoutSessionCompleted(StripeEvent):
+    data: CheckoutSessionData
+
+def finalize_booking(booking_id: str):
+    """
+    After-confirmation work, run as a background task once the webhook has answered Stripe:
+    render the QR code, store its path and send the WhatsApp confirmation.
+    """
+    db = SessionLocal()
+    try:
+        booking = db.get(Booking, booking_id)
+        if not booking:
+            return
+        # generate QR
+        qr_payload = f"booking:{booking.id}|name:{booking.guest_name}|from:{booking.check_in}|to:{booking.check_out}"
+        filename = f"qr_{booking.id}.png"
+        local_path = generate_qr_image_bytes(qr_payload, filename)
+        if MEDIA_BASE_URL:
+            booking.qr_path = MEDIA_BASE_URL.rstrip("/") + "/static/" + filename
+        else:
+            booking.qr_path = local_path
+        db.commit()
+        # send WhatsApp if available
+        if booking.channel == "whatsapp" and booking.channel_user and twilio_client:
+            try:
+                to_wh = f"whatsapp:{booking.channel_user}"
+                body = (f"🎉 Your booking is confirmed!\nBooking ID: {booking.id}\nCheck-in: {booking.check_in}\nCheck-out: {booking.check_out}")
+                media = [booking.qr_path] if booking.qr_path and MEDIA_BASE_URL else None
+                twilio_client.messages.create(from_=TWILIO_FROM, to=to_wh, body=body, media_url=media)
+            except Exception as e:
+                print("Twilio send failed:", e)
+    finally:
+        db.close()
+
+def confirm_booking(db: Session, booking_id, stripe_session_id):
+    """Mark the paid booking confirmed and return its id, or None when no booking matches."""
+    if booking_id:
+        # primary-key lookup; served from the identity map when already loaded
+        booking = db.get(Booking, booking_id)
+    else:
+        booking = db.query(Booking).filter(Booking.stripe_session_id==stripe_session_id).first()
+    if not booking:
+        return None
+    booking.status = BookingStatus.confirmed
+    db.commit()
+    return booking.id
 
 @app.post("/stripe/webhook")
-async def stripe_webhook(request: Request, stripe_signature: str = Header(None)):
+async def stripe_webhook(request: Request, background_tasks: BackgroundTasks,
+                         stripe_signature: str = Header(None), db: Session = Depends(get_db)):
     payload = await request.body()
     try:
         if STRIPE_WEBHOOK_SECRET:
-            event = stripe.Webhook.construct_event(payload, stripe_signature, STRIPE_WEBHOOK_SECRET)
-        else:
-            event = json.loads(payload)
+            # same check construct_event makes, without building a StripeObject tree we don't use
+            # (including the timestamp tolerance that stops replays of captured requests)
+            stripe.WebhookSignature.verify_header(
+                payload.decode("utf-8"), stripe_signature, STRIPE_WEBHOOK_SECRET,
+                tolerance=stripe.Webhook.DEFAULT_TOLERANCE,
+            )
+        event = StripeEvent.model_validate_json(payload)
+        if event.type == "checkout.session.completed":
+            event = CheckoutSessionCompleted.model_validate_json(payload)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Webhook error {e}")
 
-    if event["type"] == "checkout.session.completed":
-        session = event["data"]["object"]
-        booking_id = session.get("metadata", {}).get("booking_id")
-        db = SessionLocal()
-        try:
-            if not booking_id:
-                booking = db.query(Booking).filter(Booking.stripe_session_id==session.get("id")).first()
-            else:
-                booking = db.query(Booking).filter(Booking.id==booking_id).first()
-            if booking:
-                booking.status = BookingStatus.confirmed
-                # generate QR
-                qr_payload = f"booking:{booking.id}|name:{booking.guest_name}|from:{booking.check_in}|to:{booking.check_out}"
-                filename = f"qr_{booking.id}.png"
-                local_path = generate_qr_image_bytes(qr_payload, filename)
-                if MEDIA_BASE_URL:
-                    booking.qr_path = MEDIA_BASE_URL.rstrip("/") + "/static/" + filename
-                else:
-                    booking.qr_path = local_path
-                db.commit()
-                # send WhatsApp if available
-                if booking.channel == "whatsapp" and booking.channel_user and twilio_client:
-                    try:
-                        to_wh = f"whatsapp:{booking.channel_user}"
-                        body = (f"🎉 Your booking is confirmed!\nBooking ID: {booking.id}\nCheck-in: {booking.check_in}\nCheck-out: {booking.check_out}")
-                        media = [booking.qr_path] if booking.qr_path and MEDIA_BASE_URL else None
-                        twilio_client.messages.create(from_=TWILIO_FROM, to=to_wh, body=body, media_url=media)
-                    except Exception as e:
-                        print("Twilio send failed:", e)
-        finally:
-            db.close()
+    if event.type == "checkout.session.completed":
+        session = event.data.object
+        booking_id = (session.metadata or {}).get("booking_id")
+        # the DB round trips are blocking, so they run on the threadpool instead of the event loop;
+        # the confirmation is committed before answering, so a failure here is a 5xx Stripe retries
+        confirmed_id = await run_in_threadpool(confirm_booking, db, booking_id, session.id)
+        if confirmed_id:
+            # QR rendering and the Twilio round trip run after the response is sent; as a plain
+            # function, Starlette runs finalize_booking on the threadpool too
+            background_tasks.add_task(finalize_booking, confirmed_id)
 
     return {"received": True}
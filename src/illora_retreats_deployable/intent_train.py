@@ -1,31 +1,41 @@
 import yaml
-import csv
+import pandas as pd
 
 # Load the YAML file
 with open("data\\nlu.yml", "r", encoding="utf-8") as file:
     data = yaml.safe_load(file)
 
-# Open a CSV file to write
-with open("data\\intent_dataset.csv", "w", newline='', encoding="utf-8") as csvfile:
-    writer = csv.writer(csvfile)
-    writer.writerow(["question", "intent"])  # header
-
-    for item in data["nlu"]:
-        intent = item["intent"]
-        examples = item["examples"].strip().split("\n")
-        for ex in examples:
-            question = ex.strip().lstrip("-").strip()
-            writer.writerow([question, intent])
+# One row per example: split each intent's example block into lines, explode, then clean the
+# "- " bullets with vectorized string ops and write the CSV in a single call
+nlu = pd.DataFrame(data["nlu"], columns=["intent", "examples"])
+nlu["examples"] = nlu["examples"].str.strip().str.split("\n")
+nlu = nlu.explode("examples", ignore_index=True)
+nlu["question"] = nlu["examples"].str.strip().str.lstrip("-").str.strip()
+nlu[["question", "intent"]].to_csv("data\\intent_dataset.csv", index=False, encoding="utf-8")
 
 
 ######################################
 import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
 from sklearn.linear_model import LogisticRegression
 from sklearn.pipeline import Pipeline
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report
 import joblib
+import numpy as np
+import scipy.sparse as sp
+from joblib import Parallel, delayed
+
+# Below this many training questions, worker start-up costs more than it saves
+PARALLEL_MIN_DOCS = 10_000
+
+def hash_in_parallel(hasher, texts, n_jobs=-1):
+    """Tokenize + hash `texts` in one chunk per core; rows come back in input order."""
+    if len(texts) < PARALLEL_MIN_DOCS:
+        return hasher.transform(texts)
+    n_chunks = joblib.cpu_count() if n_jobs == -1 else n_jobs
+    chunks = np.array_split(np.asarray(texts, dtype=object), n_chunks)
+    return sp.vstack(Parallel(n_jobs=n_jobs)(delayed(hasher.transform)(c) for c in chunks), format="csr")
 
 # Load dataset
 df = pd.read_csv("data\\intent_dataset.csv")
@@ -34,14 +44,21 @@ df = pd.read_csv("data\\intent_dataset.csv")
 X_train, X_test, y_train, y_test = train_test_split(df["question"], df["intent"], test_size=0.2, random_state=42)
 
 # Build pipeline
-# Tfidf : converts raw text to TF-IDF vectors  --> Feature Extraction
+# Hash : raw text -> unigram/bigram counts in a fixed 2**18-column space (no vocabulary dict,
+#        constant memory, stateless transform)
+# Tfidf : re-weights the counts to TF-IDF vectors  --> Feature Extraction
 pipeline = Pipeline([
-    ('tfidf', TfidfVectorizer()),   
-    ('clf', LogisticRegression())
+    ('hash', HashingVectorizer(n_features=2**18, ngram_range=(1, 2), alternate_sign=False, norm=None)),
+    ('tfidf', TfidfTransformer()),
+    # saga works on the sparse TF-IDF rows directly and handles the multiclass loss
+    ('clf', LogisticRegression(solver='saga', max_iter=200, C=1.0))
 ])
 
 # Train the model
-pipeline.fit(X_train, y_train)
+# The hasher is stateless, so tokenization is done across cores up front and only the
+# TF-IDF + classifier steps are fitted on the counts; `pipeline` still predicts from raw text
+X_train_counts = hash_in_parallel(pipeline.named_steps['hash'], X_train)
+pipeline[1:].fit(X_train_counts, y_train)
 
 # Evaluate
 y_pred = pipeline.predict(X_test)
@@ -54,14 +71,12 @@ joblib.dump(pipeline, "intent_classifier_model.pkl")
 
 
 #### Testing the trained  model ########
-import joblib
-
-# Load the trained model
-pipeline = joblib.load("intent_classifier_model.pkl")
+# Goes through the serving loader, which loads the saved model once per process
+from services.intent_classifier import classify_intent
 
 # Example query
 query = "I want to book a spa"
-intent = pipeline.predict([query])[0]
+intent = classify_intent(query)
 
 print(f"Predicted Intent: {intent}")
 #################################################
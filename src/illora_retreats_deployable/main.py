@@ -5,6 +5,7 @@ import os
 import uuid
 import json
 import random
+import secrets
 import logging
 from typing import List, Optional, Dict, Any
 from datetime import datetime
@@ -18,6 +19,7 @@ from pydantic import BaseModel, Field
 
 from config import Config
 from services.gsheets_helper import append_row_to_sheet, find_row_by_email, update_row_by_email
+from auth_helper import check_password, hash_password, stored_password
 
 # Project imports (kept)
 import web_ui_final as web
@@ -234,8 +236,8 @@ async def login(req: LoginReq = Body(...)):
             logger.warning("Login: no userData found for %s", req.username)
             raise HTTPException(status_code=401, detail="Invalid credentials or user not found")
         # verify password
-        pw = raw_user_data.get("Password") or raw_user_data.get("password") or raw_user_data.get("Password Hash") or raw_user_data.get("password_hash")
-        if not pw or str(pw) != str(req.password):
+        # same check as auth_api: bcrypt hashes, or legacy plain-text rows (off the event loop)
+        if not await asyncio.to_thread(check_password, req.username, req.password, stored_password(raw_user_data)):
             logger.warning("Invalid password for user %s", req.username)
             raise HTTPException(status_code=401, detail="Invalid credentials or user not found")
 
@@ -274,13 +276,14 @@ async def login(req: LoginReq = Body(...)):
 @app.post("/auth/signup", tags=["authentication"])
 async def signup(req: SignupReq = Body(...)):
     logger.info("Signup attempt username=%s", req.username)
-    client_id = f"ILR-{datetime.utcnow().year}-{random.randint(1000,9999)}"
+    client_id = f"ILR-{datetime.utcnow().year}-{secrets.token_hex(3).upper()}"
     workflow_stage = "Not Booked"
     row_data = {
         "Client Id": client_id,
         "Name": req.name,
         "Email": req.username,
-        "Password": req.password,
+        # bcrypt hash, the credential format auth_api writes and both apps' logins check
+        "Password": await asyncio.to_thread(hash_password, req.password),
         "Booking Id": "",
         "Workfow Stage": workflow_stage,
         "Room Alloted": "",
@@ -332,6 +335,12 @@ async def update_workflow(req: UpdateWorkflowReq = Body(...)):
             logger.info("update_workflow: updated session for %s", req.username)
             _update_session_from_raw(req.username, returned_user_data)
 
+        # let dashboards subscribed to /events reload (best-effort)
+        try:
+            await broker.broadcast("booking.updated", {"username": req.username, "stage": req.stage, "booking_id": req.booking_id})
+        except Exception as e:
+            logger.warning(f"Failed to broadcast workflow update: {e}")
+
         return {"success": True, "message": f"Workflow stage updated to {req.stage}", "userData": returned_user_data}
     except HTTPException:
         raise
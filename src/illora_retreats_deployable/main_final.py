@@ -17,6 +17,7 @@ from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field
 
 from config import Config
+from auth_helper import hash_password
 
 # Project imports (kept)
 import web_ui_final as web
@@ -370,7 +371,8 @@ async def signup(req: SignupReq = Body(...)):
         "Client Id": client_id,
         "Name": req.name,
         "Email": req.username,
-        "Password": req.password,
+        # bcrypt hash, the credential format auth_api and main.py check
+        "Password": await asyncio.to_thread(hash_password, req.password),
         "Booking Id": "",
         "Workflow Stage": workflow_stage,
         "Room Alloted": "",
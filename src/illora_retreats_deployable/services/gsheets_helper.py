@@ -1,6 +1,9 @@
 import os
 import logging
-from typing import Dict, Any, List, Optional
+import threading
+from functools import lru_cache
+from typing import Dict, Any, Iterable, List, Optional
+from cachetools import TTLCache
 from config import Config
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -10,6 +13,12 @@ try:
 except Exception:
     gspread = None
 
+SNAPSHOT_TTL = getattr(Config, "GSHEET_SNAPSHOT_TTL", 60)
+
+# sheet name -> {"records": [...], "by_email": {lowercased email: record}}
+_snapshots: TTLCache = TTLCache(maxsize=32, ttl=SNAPSHOT_TTL)
+_snapshot_lock = threading.Lock()
+
 
 def _get_creds_path():
     return (
@@ -23,8 +32,9 @@ def _get_spreadsheet_id_or_name():
 
 
 
-def _open_worksheet(sheet_name: str):
-    """Return a gspread Worksheet instance for the configured spreadsheet and sheet name."""
+@lru_cache(maxsize=1)
+def _get_client():
+    """Authorize the service account once per process; the client keeps its HTTP session alive."""
     if gspread is None:
         raise RuntimeError("gspread not available")
 
@@ -32,21 +42,32 @@ def _open_worksheet(sheet_name: str):
     if not creds_path or not os.path.exists(creds_path):
         raise RuntimeError("Google service account JSON not found. Set GOOGLE_SERVICE_ACCOUNT_JSON or GOOGLE_APPLICATION_CREDENTIALS to a valid path.")
 
-    client = gspread.service_account(filename=creds_path)
+    return gspread.service_account(filename=creds_path)
+
 
+@lru_cache(maxsize=1)
+def _get_spreadsheet():
     ss_id = _get_spreadsheet_id_or_name()
     if not ss_id:
         raise RuntimeError("Spreadsheet identifier not configured. Set SPREADSHEET_ID or SPREADSHEET_NAME environment variable.")
 
+    client = _get_client()
+    # If id looks like an ID (contains : or long), try open_by_key
+    try:
+        return client.open_by_key(ss_id)
+    except Exception:
+        return client.open(ss_id)
+
+
+@lru_cache(maxsize=32)
+def _open_worksheet(sheet_name: str):
+    """Return a gspread Worksheet instance for the configured spreadsheet and sheet name.
+
+    Client, spreadsheet and worksheet handles are cached (failures are not), so repeat calls
+    make no auth or metadata requests.
+    """
     try:
-        # If id looks like an ID (contains : or long), try open_by_key
-        ws = None
-        try:
-            sh = client.open_by_key(ss_id)
-        except Exception:
-            sh = client.open(ss_id)
-        ws = sh.worksheet(sheet_name)
-        return ws
+        return _get_spreadsheet().worksheet(sheet_name)
     except Exception as e:
         logger.exception("_open_worksheet failed for sheet=%s: %s", sheet_name, e)
         raise
@@ -66,29 +87,61 @@ def append_row_to_sheet(sheet_name: str, row_data: Dict[str, Any]) -> Dict[str,
             ws.append_row(headers, value_input_option="RAW")
         ordered = [row_data.get(h, "") for h in headers]
         ws.append_row(ordered, value_input_option="RAW")
+        invalidate_snapshot(sheet_name)
         return {"success": True}
     except Exception as e:
         logger.exception("append_row_to_sheet failed for %s", sheet_name)
         return {"success": False, "message": str(e)}
 
 
+def _is_email_header(header: str) -> bool:
+    return bool(header) and ''.join(ch.lower() for ch in header if ch.isalnum()) in ("email", "username")
+
+
+def snapshot_sheet(sheet_name: str) -> Dict[str, Any]:
+    """Fetch the whole sheet once and index it by lowercased email; reused for SNAPSHOT_TTL seconds."""
+    with _snapshot_lock:
+        snap = _snapshots.get(sheet_name)
+    if snap is not None:
+        return snap
+
+    records = _open_worksheet(sheet_name).get_all_records()
+    email_headers = [k for k in (records[0] if records else {}) if _is_email_header(k)]
+    by_email: Dict[str, Dict[str, Any]] = {}
+    for r in records:
+        for k in email_headers:
+            by_email.setdefault(str(r.get(k) or "").strip().lower(), r)
+    snap = {"records": records, "by_email": by_email}
+    with _snapshot_lock:
+        _snapshots[sheet_name] = snap
+    return snap
+
+
+def invalidate_snapshot(sheet_name: str) -> None:
+    """Forget the cached snapshot of `sheet_name` so the next read hits Google Sheets."""
+    with _snapshot_lock:
+        _snapshots.pop(sheet_name, None)
+
+
 def find_row_by_email(sheet_name: str, email: str) -> Optional[Dict[str, Any]]:
     """Return the first row dict where a header normalised to 'email' or 'username' matches the email."""
     try:
-        ws = _open_worksheet(sheet_name)
-        records = ws.get_all_records()
-        target = (email or "").strip().lower()
-        for r in records:
-            for k, v in r.items():
-                if k and ''.join(ch.lower() for ch in k if ch.isalnum()) in ("email", "username"):
-                    if str(v or "").strip().lower() == target:
-                        return r
-        return None
+        return snapshot_sheet(sheet_name)["by_email"].get((email or "").strip().lower())
     except Exception as e:
         logger.exception("find_row_by_email failed: %s", e)
         return None
 
 
+def bulk_find_rows(sheet_name: str, emails: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Look up several emails against a single sheet fetch. Returns {email: row or None}."""
+    try:
+        by_email = snapshot_sheet(sheet_name)["by_email"]
+    except Exception as e:
+        logger.exception("bulk_find_rows failed: %s", e)
+        by_email = {}
+    return {e: by_email.get((e or "").strip().lower()) for e in emails}
+
+
 def get_all_records(sheet_name: str) -> List[Dict[str, Any]]:
     """Return all rows as list of dicts using headers as keys."""
     try:
@@ -106,9 +159,10 @@ def update_row_by_email(sheet_name: str, email: str, updates: Dict[str, Any]) ->
         headers = ws.row_values(1)
         records = ws.get_all_records()
         target = (email or "").strip().lower()
+        header_count = len(headers)
         for idx, r in enumerate(records, start=2):
             for k, v in r.items():
-                if k and ''.join(ch.lower() for ch in k if ch.isalnum()) in ("email", "username"):
+                if _is_email_header(k):
                     if str(v or "").strip().lower() == target:
                         # build updated row values
                         padded = [r.get(h, "") for h in headers]
@@ -119,10 +173,12 @@ def update_row_by_email(sheet_name: str, email: str, updates: Dict[str, Any]) ->
                             else:
                                 headers.append(uk)
                                 padded.append(uv)
-                        # If headers extended, update header row
-                        if len(headers) > len(ws.row_values(1)):
-                            ws.update("A1", [headers])
-                        ws.update(f"A{idx}", [padded])
+                        # Header row (if extended) and the data row go out in one request
+                        data = [{"range": f"A{idx}", "values": [padded]}]
+                        if len(headers) > header_count:
+                            data.insert(0, {"range": "A1", "values": [headers]})
+                        ws.batch_update(data)
+                        invalidate_snapshot(sheet_name)
                         return {"success": True, "userData": r}
         return {"success": False, "message": "Email not found"}
     except Exception as e:
@@ -1,11 +1,76 @@
 import os
 import joblib
+import numpy as np
+import scipy.sparse as sp
+from functools import lru_cache
+from typing import List
+
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from sklearn.linear_model import LogisticRegression
 
-# Load pipeline 
 MODEL_PATH = "intent_classifier_model.pkl"
-pipeline = joblib.load(MODEL_PATH)
+
+class CompiledIntentModel:
+    """
+    A fitted hash -> tfidf -> logistic-regression pipeline reduced to plain arrays.
+
+    Only the feature columns with a non-zero coefficient are kept, and predict is a single
+    sparse x dense product with no per-step validation. Labels match pipeline.predict.
+    Raises ValueError for any other pipeline shape.
+    """
+
+    def __init__(self, pipeline):
+        steps = [step for _, step in pipeline.steps]
+        if len(steps) != 3:
+            raise ValueError("expected a hash -> tfidf -> clf pipeline")
+        hasher, tfidf, clf = steps
+        if not (isinstance(hasher, HashingVectorizer) and hasher.norm is None
+                and isinstance(tfidf, TfidfTransformer) and tfidf.use_idf and tfidf.norm == "l2"
+                and not tfidf.sublinear_tf and isinstance(clf, LogisticRegression)):
+            raise ValueError("unsupported pipeline configuration")
+
+        coef = clf.coef_.toarray() if sp.issparse(clf.coef_) else clf.coef_
+        used = np.flatnonzero(np.any(coef != 0, axis=0))
+        self.hasher = hasher
+        self.idf = tfidf.idf_  # every hashed column counts towards the row's L2 norm
+        # hashed column -> row of `weights`; unused columns point at the trailing zero row
+        self.col_map = np.full(coef.shape[1], len(used), dtype=np.int32)
+        self.col_map[used] = np.arange(len(used), dtype=np.int32)
+        self.weights = np.vstack([coef[:, used].T, np.zeros((1, coef.shape[0]))])
+        self.intercept = clf.intercept_
+        self.classes = clf.classes_
+
+    def predict(self, texts: List[str]) -> np.ndarray:
+        X = self.hasher.transform(texts)
+        data = X.data * self.idf[X.indices]
+        rows = np.repeat(np.arange(X.shape[0]), np.diff(X.indptr))
+        norms = np.sqrt(np.bincount(rows, data * data, minlength=X.shape[0]))
+        norms[norms == 0] = 1.0
+        Xc = sp.csr_matrix((data / norms[rows], self.col_map[X.indices], X.indptr),
+                           shape=(X.shape[0], self.weights.shape[0]))
+        scores = Xc @ self.weights + self.intercept
+        if scores.shape[1] == 1:
+            return self.classes[(scores[:, 0] > 0).astype(int)]
+        return self.classes[scores.argmax(axis=1)]
+
+@lru_cache(maxsize=1)
+def get_intent_pipeline():
+    """Load the pipeline on first use and keep it for the life of the process."""
+    return joblib.load(MODEL_PATH)
+
+@lru_cache(maxsize=1)
+def get_intent_predictor():
+    """Compiled predictor for the saved pipeline; the pipeline itself when it can't be compiled."""
+    pipeline = get_intent_pipeline()
+    try:
+        return CompiledIntentModel(pipeline)
+    except ValueError:
+        return pipeline
 
 def classify_intent(text: str) -> str:
     """Return predicted intent for a given text."""
-    return pipeline.predict([text])[0]
+    return get_intent_predictor().predict([text])[0]
 
+def classify_intents(texts: List[str]) -> List[str]:
+    """Predicted intents for several texts in one sparse predict call."""
+    return list(get_intent_predictor().predict(texts))
@@ -1,6 +1,6 @@
 # app/twilio_webhook.py
 
-from flask import Flask, request
+from flask import Flask, request, Response, stream_with_context, session
 from twilio.twiml.messaging_response import MessagingResponse
 from Hotel_AI_Bot import IloraRetreatsConciergeBot
 from services.payment_gateway import create_checkout_session, create_addon_checkout_session
@@ -13,12 +13,15 @@ import json
 import os
 import hashlib
 import re
+import secrets
 from datetime import datetime, timedelta
 
 # Set up logging
 logger = setup_logger("TwilioWebhook")
 
 app = Flask(__name__)
+# Web chat sessions live in a signed cookie; /chat/stream refuses to run without a key
+app.secret_key = getattr(Config, "FLASK_SECRET_KEY", None)
 bot = IloraRetreatsConciergeBot()
 session_data = {}
 sheets_service = GoogleSheetsService()
@@ -646,5 +649,43 @@ def whatsapp_reply():
         return str(msg)
 
 
+@app.route("/chat/stream", methods=["POST"])
+def chat_stream():
+    """Stream the concierge answer to web clients as Server-Sent Events"""
+    if not app.secret_key:
+        return {"error": "chat streaming is disabled: FLASK_SECRET_KEY is not set"}, 503
+    payload = request.get_json(silent=True) or {}
+    query = str(payload.get("message", "")).strip()
+    if not query:
+        return {"error": "message is required"}, 400
+
+    # The chat session is issued by the server and kept in the signed session cookie; nothing in
+    # the request body chooses whose history is loaded. The "web:" prefix keeps these keys apart
+    # from the WhatsApp sessions. Web callers are unauthenticated, so they always get the
+    # non-guest prompt.
+    if "chat_sid" not in session:
+        session["chat_sid"] = secrets.token_urlsafe(16)
+    session_key = f"web:{session['chat_sid']}"
+    user_type = "non-guest"
+    # the {session_key: session} shape _extract_session_object reads, so the stream loads and
+    # saves chat history under session_key like the non-streaming path
+    user_session = {session_key: {}}
+
+    def generate():
+        try:
+            for piece in bot.ask_stream(query, user_type=user_type, user_session=user_session, session_key=session_key):
+                yield f"data: {json.dumps({'delta': piece})}\n\n"
+        except Exception as e:
+            logger.error(f"Bot stream error: {e}")
+            yield f"data: {json.dumps({'error': 'stream failed'})}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 if __name__ == "__main__":
     app.run(debug=True, port=5002)